@@ -1,6 +1,5 @@
 from TrackClass import Track
-from PlaylistClass import Playlist
-import json
+from LibraryContainer import LibraryContainer
 
 class AVLNode:
     def __init__(self, track: Track):
@@ -8,10 +7,15 @@ class AVLNode:
         self.__left = None
         self.__right = None
         self.__height = 1
+        self.__size = 1
+        self.__totalSeconds = track.getDurationInSeconds()
     
     def getTrack(self):
         return self.__track
 
+    def setTrack(self, track: Track):
+        self.__track = track
+
     def getLeft(self):
         return self.__left
 
@@ -30,12 +34,28 @@ class AVLNode:
     def setHeight(self, height):
         self.__height = height
 
-class AVLTree:
+    def getSize(self):
+        return self.__size
+
+    def setSize(self, size):
+        self.__size = size
+
+    def getTotalSeconds(self):
+        return self.__totalSeconds
+
+    def setTotalSeconds(self, totalSeconds):
+        self.__totalSeconds = totalSeconds
+
+class AVLTree(LibraryContainer):
     def __init__(self):
+        super().__init__()
         self.__root = None 
         
     def getRoot(self):
         return self.__root
+
+    def setRoot(self, root: AVLNode):
+        self.__root = root
     
     def getHeight(self, node: AVLNode):
         
@@ -68,6 +88,49 @@ class AVLTree:
         else:
             node.setHeight( rightReight + 1)
                    
+    def getNodeSize(self, node: AVLNode):
+        
+        """
+        Returns the number of tracks in the subtree rooted at node, or 0 for None.
+        """
+        
+        return node.getSize() if node else 0
+
+    def getNodeSeconds(self, node: AVLNode):
+        
+        """
+        Returns the total duration in seconds of the subtree rooted at node, or 0 for None.
+        """
+        
+        return node.getTotalSeconds() if node else 0
+
+    def updateAggregates(self, node: AVLNode):
+        
+        """
+        Recomputes the subtree size and total seconds of a node from its children.
+        
+        Parameters:
+            node (AVLNode): The node whose aggregates need updating.
+        """
+        
+        left = node.getLeft()
+        right = node.getRight()
+        node.setSize(self.getNodeSize(left) + self.getNodeSize(right) + 1)
+        node.setTotalSeconds(self.getNodeSeconds(left) + self.getNodeSeconds(right)
+                             + node.getTrack().getDurationInSeconds())
+
+    def updateNode(self, node: AVLNode):
+        
+        """
+        Updates both the height and the subtree aggregates of a node.
+        
+        Parameters:
+            node (AVLNode): The node whose children just changed.
+        """
+        
+        self.updateHeight(node)
+        self.updateAggregates(node)
+
     def getBalanceFactor(self, node: AVLNode):
         
         """
@@ -101,9 +164,9 @@ class AVLTree:
         rootLeft.setRight(root)
         root.setLeft(rootLeftRight)
         
-        # Update heights after rotation.
-        self.updateHeight(root)
-        self.updateHeight(rootLeft)
+        # Update heights and aggregates after rotation.
+        self.updateNode(root)
+        self.updateNode(rootLeft)
         
         return rootLeft
 
@@ -126,9 +189,9 @@ class AVLTree:
         rootRight.setLeft(root)
         root.setRight(rootRightLeft)
         
-        # Update heights after rotation.
-        self.updateHeight(root)
-        self.updateHeight(rootRight)
+        # Update heights and aggregates after rotation.
+        self.updateNode(root)
+        self.updateNode(rootRight)
         
         return rootRight
     
@@ -165,30 +228,6 @@ class AVLTree:
             
         return node 
 
-    def compareTracks(self, track1: Track, track2: Track):
-        
-        """
-        Compares two tracks for ordering in the AVL Tree.
-
-        Parameters:
-            track1 (Track): The first track to compare.
-            track2 (Track): The second track to compare.
-
-        Returns:
-            bool: True if track1 is less than track2, False otherwise.
-        """
-        
-        if track1.getTitle() != track2.getTitle():
-            return track1.getTitle() < track2.getTitle()
-        
-        if track1.getArtist() != track2.getArtist():
-            return track1.getArtist() < track2.getArtist()
-        
-        if track1.getAlbum() != track2.getAlbum():
-            return track1.getAlbum() < track2.getAlbum()
-        
-        return track1.getDuration() < track2.getDuration()
-
     def insert(self, node: AVLNode, track: Track):
         """Inserts a track, updates node heights, 
         and balances the AVL tree."""
@@ -201,29 +240,94 @@ class AVLTree:
         else:
             node.setRight(self.insert(node.getRight(), track))
 
-        self.updateHeight(node)
+        self.updateNode(node)
 
         return self.autoRotate(node)
 
-    def addTrack(self, track: Track):
+    def rebalancePath(self, path: list):
         
         """
-        Adds a track to the AVL Tree if it doesn't already exist.
+        Walks back up a recorded search path, updating heights and rotating
+        where needed. Once a subtree keeps its height without rotating nothing
+        above it can need a rotation, so only the aggregates are refreshed
+        for the rest of the path.
         
         Parameters:
-            track (Track): The track to add.
+            path (list): (node, wentLeft) pairs from the root down to the
+            parent of the changed position.
+        """
+        
+        index = len(path) - 1
+        while index >= 0:
+            node = path[index][0]
+            oldHeight = node.getHeight()
+            self.updateNode(node)
+            newRoot = self.autoRotate(node)
+            
+            if newRoot is node and node.getHeight() == oldHeight:
+                break
+            
+            # Reattach the (possibly rotated) subtree to its parent.
+            if index == 0:
+                self.__root = newRoot
+            elif path[index - 1][1]:
+                path[index - 1][0].setLeft(newRoot)
+            else:
+                path[index - 1][0].setRight(newRoot)
+            index -= 1
+        
+        index -= 1
+        while index >= 0:
+            self.updateAggregates(path[index][0])
+            index -= 1
+
+    def insertIfAbsent(self, track: Track) -> bool:
+        
+        """
+        Inserts a track without recursion, unless a track with the same title
+        and artist already exists. The existence check and the insert share a
+        single walk down the tree.
+        
+        Parameters:
+            track (Track): The track to insert.
         
         Returns:
-            bool: True if the track was added, False otherwise.
+            bool: True if the track was inserted, False if it already existed.
         """
         
-        check = self.searchTrack(track.getTitle(), track.getArtist())
+        title = track.getTitle()
+        artist = track.getArtist()
+        path = []
+        current = self.__root
         
-        if check == None:
-            self.__root = self.insert(self.__root, track)
+        while current:
+            other = current.getTrack()
+            otherTitle = other.getTitle()
+            if title == otherTitle:
+                otherArtist = other.getArtist()
+                if artist == otherArtist:
+                    return False
+                wentLeft = artist < otherArtist
+            else:
+                wentLeft = title < otherTitle
+            
+            path.append((current, wentLeft))
+            current = current.getLeft() if wentLeft else current.getRight()
+        
+        newNode = AVLNode(track)
+        if not path:
+            self.__root = newNode
+            return True
+        
+        parent, wentLeft = path[-1]
+        if wentLeft:
+            parent.setLeft(newNode)
+        else:
+            parent.setRight(newNode)
+        
+        self.rebalancePath(path)
+        return True
 
-        return False
-    
     def delete(self, node: AVLNode, track: Track): 
         """Deletes a track from the AVL tree 
             by locating the node containing the track """
@@ -241,14 +345,72 @@ class AVLTree:
             elif not node.getRight():
                 return node.getLeft()
 
+            # Move the successor's track into this node instead of copying its
+            # attributes, so Track objects shared with playlists stay untouched.
             min_node = self.getMinNode(node.getRight())
-            node.getTrack().__dict__.update(min_node.getTrack().__dict__)
+            node.setTrack(min_node.getTrack())
             node.setRight(self.delete(node.getRight(), min_node.getTrack()))
 
-        self.updateHeight(node)
+        self.updateNode(node)
 
         return self.autoRotate(node)
     
+    def deleteIfPresent(self, track: Track) -> Track:
+        
+        """
+        Deletes a track without recursion, keeping an explicit parent stack
+        for the rebalancing pass.
+        
+        Parameters:
+            track (Track): The track to delete.
+        
+        Returns:
+            Track: The track object that was removed, or None if not found.
+        """
+        
+        path = []
+        current = self.__root
+        
+        while current:
+            if self.compareTracks(track, current.getTrack()):
+                path.append((current, True))
+                current = current.getLeft()
+            elif self.compareTracks(current.getTrack(), track):
+                path.append((current, False))
+                current = current.getRight()
+            else:
+                break
+        
+        if not current:
+            return None
+        
+        deleted = current.getTrack()
+        if current.getLeft() and current.getRight():
+            # Pull the in-order successor up and unlink its node instead.
+            path.append((current, False))
+            successor = current.getRight()
+            while successor.getLeft():
+                path.append((successor, True))
+                successor = successor.getLeft()
+            current.setTrack(successor.getTrack())
+            removed = successor
+        else:
+            removed = current
+        
+        replacement = removed.getLeft() or removed.getRight()
+        if not path:
+            self.__root = replacement
+            return deleted
+        
+        parent, wentLeft = path[-1]
+        if wentLeft:
+            parent.setLeft(replacement)
+        else:
+            parent.setRight(replacement)
+        
+        self.rebalancePath(path)
+        return deleted
+
     def getMinNode(self, node: AVLNode):
         
         # Finds the node with the minimum value in the subtree.
@@ -258,121 +420,279 @@ class AVLTree:
             current = current.getLeft()
         return current
     
-    def removeTrack(self, track: Track):
-        """Removes a track from the AVL tree and 
-        updates all playlists by removing the track if it exists."""
+    def traverse(self, node: AVLNode, result: list, order: str):
+        """Traverses the subtree in the given order ("inorder", "preorder"
+        or "postorder") and appends tracks to the result list."""
+        
+        result += self.iterNodes(node, order)
+
+    def iterNodes(self, node: AVLNode, order: str = "inorder"):
+        
+        """
+        Lazily yields the tracks of a subtree using an explicit stack, so
+        nothing is copied and no recursion is needed.
+        
+        Parameters:
+            node (AVLNode): The root of the subtree to walk.
+            order (str): "inorder", "preorder" or "postorder".
         
-        self.__root = self.delete(self.__root, track)
+        Returns:
+            generator: The tracks in the requested order.
+        """
+        
+        if order == "preorder":
+            stack = [node] if node else []
+            while stack:
+                current = stack.pop()
+                yield current.getTrack()
+                if current.getRight():
+                    stack.append(current.getRight())
+                if current.getLeft():
+                    stack.append(current.getLeft())
+        
+        elif order == "postorder":
+            # Walk root-right-left and reverse it at the end.
+            stack = [node] if node else []
+            output = []
+            while stack:
+                current = stack.pop()
+                output.append(current.getTrack())
+                if current.getLeft():
+                    stack.append(current.getLeft())
+                if current.getRight():
+                    stack.append(current.getRight())
+            while output:
+                yield output.pop()
         
-        for playlistName in Playlist.getPlaylistName():
-            Playlist.loadFromJson(playlistName).removeTrack(track.getTitle())
+        else:
+            stack = []
+            current = node
+            while current:
+                stack.append(current)
+                current = current.getLeft()
+            yield from self.iterFromStack(stack)
+
+    def __iter__(self):
+        return self.iterNodes(self.__root)
 
-    def getDuplicates(self, node: AVLNode, title) -> list:
-        """searches ang AVL tree for tracks with 
-        the given title and returns a list of duplicates"""
+    def getSize(self) -> int:
         
-        duplicates = []
-        if node:
-            duplicates += self.getDuplicates(node.getLeft(), title)
+        """
+        Returns:
+            int: The number of tracks in the tree.
+        """
+        
+        return self.getNodeSize(self.__root)
 
-            if node.getTrack().getTitle() == title:
-                duplicates += [node.getTrack()]
+    def getTotalSeconds(self) -> int:
+        
+        """
+        Returns:
+            int: The total duration of all tracks in seconds.
+        """
+        
+        return self.getNodeSeconds(self.__root)
 
-            duplicates += self.getDuplicates(node.getRight(), title)
+    def rank(self, track: Track) -> int:
         
-        return duplicates
-    
-    def traverse(self, node: AVLNode, result: list, order: str):
-        """Traverses the AVL tree in-order and appends tracks to 
-        the result list."""
+        """
+        Counts the tracks that sort before the given track in O(log n). For a
+        track in the tree this is its 0-based position in getSortedTracks.
         
-        if not node:
-            return
+        Parameters:
+            track (Track): The track to rank.
         
-        self.traverse(node.getLeft(), result, order)
-        result += [node.getTrack()]
-        self.traverse(node.getRight(), result, order)
+        Returns:
+            int: The number of tracks ordered before it.
+        """
         
-    def getTotalDuration(self):
+        key = track.getSortKey()
+        position = 0
+        current = self.__root
+        while current:
+            if current.getTrack().getSortKey() < key:
+                position += self.getNodeSize(current.getLeft()) + 1
+                current = current.getRight()
+            else:
+                current = current.getLeft()
+        return position
+
+    def select(self, index: int) -> Track:
         
         """
-        Calculates the total duration of all tracks in the tree.
+        Finds the track at a 0-based position of the sorted order in O(log n).
+        
+        Parameters:
+            index (int): The position to look up.
         
         Returns:
-            str: The total duration in "MM:SS" format.
+            Track: The track at that position, or None if out of range.
         """
         
-        def sumDurations(node: AVLNode):
-            if not node:
-                return 0
-            leftDuration = sumDurations(node.getLeft())
-            rightDuration = sumDurations(node.getRight())
-            return node.getTrack().getDurationInSeconds() + leftDuration + rightDuration
+        if index < 0 or index >= self.getSize():
+            return None
         
-        totalSeconds = sumDurations(self.getRoot())
-        minutes = totalSeconds // 60
-        seconds = totalSeconds % 60
-        return f"{minutes:02}:{seconds:02}"
+        current = self.__root
+        while current:
+            leftSize = self.getNodeSize(current.getLeft())
+            if index < leftSize:
+                current = current.getLeft()
+            elif index == leftSize:
+                return current.getTrack()
+            else:
+                index -= leftSize + 1
+                current = current.getRight()
+        return None
 
-    def getSortedTracks(self) -> list:
+    def getPrefixSeconds(self, count: int) -> int:
         
         """
-        Retrieves all tracks in sorted order.
+        Sums the durations of the first count tracks in sorted order in O(log n).
+        
+        Parameters:
+            count (int): How many tracks from the start to include.
         
         Returns:
-            list: A list of tracks sorted by title, artist, album, and duration.
+            int: Their total duration in seconds.
         """
         
-        result = []
-        self.traverse(self.__root, result, "inorder")
-        return result      
+        total = 0
+        current = self.__root
+        while current and count > 0:
+            leftSize = self.getNodeSize(current.getLeft())
+            if count <= leftSize:
+                current = current.getLeft()
+            else:
+                total += self.getNodeSeconds(current.getLeft()) + current.getTrack().getDurationInSeconds()
+                count -= leftSize + 1
+                current = current.getRight()
+        return total
 
-    def searchTrack(self, title: str, artist: str | None = None) -> Track:
+    def getRangeDuration(self, start: int, end: int) -> int:
         
         """
-        Searches for a specific track in the tree.
+        Total duration of the tracks at sorted positions start (inclusive) to
+        end (exclusive), in O(log n).
         
         Parameters:
-            title (str): The title of the track to search for.
-            artist (str | None): The artist of the track (optional).
+            start (int): First position of the range.
+            end (int): Position just past the end of the range.
         
         Returns:
-            Track: The found track, or None if not found.
+            int: The total duration of the range in seconds.
         """
         
+        if end <= start:
+            return 0
+        return self.getPrefixSeconds(end) - self.getPrefixSeconds(start)
+
+    def buildStructure(self, tracks: list):
+        
+        """
+        Replaces the tree with a perfectly balanced one built straight from
+        sorted tracks in linear time.
+        
+        Parameters:
+            tracks (list): The tracks, in sorted order.
+        """
+        
+        nodes = [AVLNode(track) for track in tracks]
+        
+        def build(low: int, high: int):
+            # Middle element becomes the root of the slice [low, high).
+            if low >= high:
+                return None
+            mid = (low + high) // 2
+            node = nodes[mid]
+            node.setLeft(build(low, mid))
+            node.setRight(build(mid + 1, high))
+            self.updateNode(node)
+            return node
+        
+        self.__root = build(0, len(nodes))
+
+    def seek(self, key: tuple) -> list:
+        
+        """
+        Builds an in-order stack positioned at the first track whose sort key
+        is not less than the given (possibly partial) key.
+        
+        Parameters:
+            key (tuple): A leading part of the (title, artist, album, duration) key.
+        
+        Returns:
+            list: Stack of nodes; popping it yields tracks in sorted order.
+        """
+        
+        length = len(key)
+        stack = []
+        current = self.__root
+        while current:
+            if current.getTrack().getSortKey()[:length] < key:
+                current = current.getRight()
+            else:
+                stack.append(current)
+                current = current.getLeft()
+        return stack
+
+    def iterFromStack(self, stack: list):
+        
+        """
+        Yields tracks in sorted order from a stack prepared by seek.
+        
+        Parameters:
+            stack (list): The in-order stack; it is consumed.
+        """
+        
+        while stack:
+            node = stack.pop()
+            yield node.getTrack()
+            current = node.getRight()
+            while current:
+                stack.append(current)
+                current = current.getLeft()
+
+    def seekIndex(self, index: int) -> list:
+        
+        """
+        Builds an in-order stack positioned at a 0-based position of the
+        sorted order, using the subtree sizes to skip everything before it.
+        
+        Parameters:
+            index (int): The position to start from.
+        
+        Returns:
+            list: Stack of nodes for iterFromStack.
+        """
+        
+        stack = []
         current = self.__root
         while current:
-            track = current.getTrack()
-            if title == track.getTitle() and (artist is None or artist == track.getArtist()):
-                return track
-            if title < track.getTitle():
+            leftSize = self.getNodeSize(current.getLeft())
+            if index < leftSize:
+                stack.append(current)
                 current = current.getLeft()
+            elif index == leftSize:
+                stack.append(current)
+                break
             else:
+                index -= leftSize + 1
                 current = current.getRight()
-        return None 
-    
-    def saveToJson(self, filename="Data/tracks.json"):
-        tracks = self.getSortedTracks()
-        with open(filename, 'w') as file:
-            json.dump([track.toDict() for track in tracks], file, indent=2)
-
-    def loadFromJson(self, filename="Data/tracks.json"):
-        """Loads tracks from a JSON file and inserts them into the AVL tree.
-        handles missing file errors."""
-        
-        try:
-            with open(filename, 'r') as file:
-                data = json.load(file)
-                for track_data in data:
-                    track = Track.fromDict(track_data)
-                    self.__root = self.insert(self.__root, track)
-        except FileNotFoundError:
-            print(f"File {filename} not found.")
-
-    def __str__(self) -> str:
-        s = f"\n<---------All Tracks--------->\n\nTotal Duration: {self.getTotalDuration()}\n\n"
-        num = 1
-        for track in self.getSortedTracks():
-            s += f"{num}. " + track.__str__(True) + "\n"
-            num += 1
-        return s
\ No newline at end of file
+        return stack
+
+    def iterFrom(self, index: int):
+        
+        """
+        Yields tracks in sorted order starting at a 0-based position.
+        """
+        
+        return self.iterFromStack(self.seekIndex(index))
+
+    def iterFromKey(self, key: tuple):
+        
+        """
+        Yields tracks in sorted order starting at the first one whose sort key
+        is not less than the given (possibly partial) key.
+        """
+        
+        return self.iterFromStack(self.seek(key))
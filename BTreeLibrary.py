@@ -0,0 +1,355 @@
+from TrackClass import Track
+from LibraryContainer import LibraryContainer
+import bisect
+
+class BTreeNode:
+    def __init__(self, leaf: bool, keys: list | None = None, items: list | None = None, sizes: list | None = None):
+        self.__leaf = leaf
+        # Leaf: the sort key of each track. Internal: the first key under each child.
+        self.__keys = keys or []
+        # Leaf: the tracks. Internal: the child nodes.
+        self.__items = items or []
+        # Internal only: how many tracks are under each child.
+        self.__sizes = sizes or []
+        self.__next = None
+        self.__prev = None
+
+    def isLeaf(self):
+        return self.__leaf
+
+    def getKeys(self):
+        return self.__keys
+
+    def getItems(self):
+        return self.__items
+
+    def getSizes(self):
+        return self.__sizes
+
+    def getNext(self):
+        return self.__next
+
+    def setNext(self, next):
+        self.__next = next
+
+    def getPrev(self):
+        return self.__prev
+
+    def setPrev(self, prev):
+        self.__prev = prev
+
+    def __getstate__(self):
+        """
+        Pickles the node without its leaf links. Following them would make
+        pickle recurse once per leaf; BTreeLibrary relinks the leaves after
+        loading.
+        """
+        state = self.__dict__.copy()
+        state["_BTreeNode__next"] = None
+        state["_BTreeNode__prev"] = None
+        return state
+
+class BTreeLibrary(LibraryContainer):
+    """
+    Library backend on a B+ tree with a wide fan-out. Each node holds up to
+    `order` entries in plain lists, so a lookup touches only a handful of
+    Python objects, and the leaves are linked for fast in-order scans.
+
+    Nodes split when they overflow. Deletion removes nodes only once they are
+    empty instead of merging neighbours, which keeps it simple; the height
+    never grows from deletions.
+    """
+
+    def __init__(self, order: int = 64):
+        super().__init__()
+        self.__order = order
+        self.__root = BTreeNode(True)
+        self.__size = 0
+        self.__totalSeconds = 0
+
+    def getRoot(self):
+        return self.__root
+
+    def countOf(self, node: BTreeNode) -> int:
+
+        """
+        Returns:
+            int: The number of tracks stored under a node.
+        """
+
+        return len(node.getItems()) if node.isLeaf() else sum(node.getSizes())
+
+    def descend(self, key: tuple, path: list | None = None) -> BTreeNode:
+
+        """
+        Walks to the leaf that holds (or would hold) a full sort key: the last
+        child whose first key is not greater than the key, at every level.
+
+        Parameters:
+            key (tuple): The sort key to look for.
+            path (list | None): If given, receives the (node, childIndex) pairs walked.
+
+        Returns:
+            BTreeNode: The leaf.
+        """
+
+        node = self.__root
+        while not node.isLeaf():
+            child = bisect.bisect_right(node.getKeys(), key) - 1
+            if child < 0:
+                child = 0
+            if path is not None:
+                path.append((node, child))
+            node = node.getItems()[child]
+        return node
+
+    def updateFirstKeys(self, path: list, key: tuple):
+
+        """
+        Propagates a node's new first key to the ancestors that store it.
+        """
+
+        for parent, child in reversed(path):
+            parent.getKeys()[child] = key
+            if child != 0:
+                break
+
+    def insertIfAbsent(self, track: Track) -> bool:
+
+        """
+        Inserts a track unless one with the same title and artist exists.
+        Same (title, artist) tracks sit next to each other, so the check only
+        looks at the neighbours of the insert position found by one descent.
+
+        Returns:
+            bool: True if the track was inserted.
+        """
+
+        key = track.getSortKey()
+        prefix = key[:2]
+        path = []
+        leaf = self.descend(key, path)
+        keys = leaf.getKeys()
+        index = bisect.bisect_right(keys, key)
+
+        before = keys[index - 1] if index > 0 else (leaf.getPrev().getKeys()[-1] if leaf.getPrev() else None)
+        after = keys[index] if index < len(keys) else (leaf.getNext().getKeys()[0] if leaf.getNext() else None)
+        if (before and before[:2] == prefix) or (after and after[:2] == prefix):
+            return False
+
+        keys.insert(index, key)
+        leaf.getItems().insert(index, track)
+        self.__size += 1
+        self.__totalSeconds += track.getDurationInSeconds()
+        for node, child in path:
+            node.getSizes()[child] += 1
+        if index == 0:
+            self.updateFirstKeys(path, key)
+
+        self.splitOverflow(leaf, path)
+        return True
+
+    def splitOverflow(self, node: BTreeNode, path: list):
+
+        """
+        Splits a node that holds more than `order` entries, moving the upper
+        half into a new right sibling, and repeats upwards while parents
+        overflow in turn.
+        """
+
+        while len(node.getItems()) > self.__order:
+            mid = len(node.getItems()) // 2
+            sibling = BTreeNode(node.isLeaf(), node.getKeys()[mid:], node.getItems()[mid:], node.getSizes()[mid:])
+            del node.getKeys()[mid:]
+            del node.getItems()[mid:]
+            del node.getSizes()[mid:]
+
+            if node.isLeaf():
+                sibling.setNext(node.getNext())
+                sibling.setPrev(node)
+                if node.getNext():
+                    node.getNext().setPrev(sibling)
+                node.setNext(sibling)
+
+            if not path:
+                self.__root = BTreeNode(False, [node.getKeys()[0], sibling.getKeys()[0]], [node, sibling],
+                                        [self.countOf(node), self.countOf(sibling)])
+                return
+
+            parent, child = path.pop()
+            parent.getKeys().insert(child + 1, sibling.getKeys()[0])
+            parent.getItems().insert(child + 1, sibling)
+            parent.getSizes()[child] = self.countOf(node)
+            parent.getSizes().insert(child + 1, self.countOf(sibling))
+            node = parent
+
+    def deleteIfPresent(self, track: Track) -> Track:
+
+        """
+        Deletes the track with the same sort key.
+
+        Returns:
+            Track: The track object that was removed, or None if not found.
+        """
+
+        key = track.getSortKey()
+        path = []
+        leaf = self.descend(key, path)
+        keys = leaf.getKeys()
+        index = bisect.bisect_left(keys, key)
+        if index == len(keys) or keys[index] != key:
+            return None
+
+        del keys[index]
+        removed = leaf.getItems().pop(index)
+        self.__size -= 1
+        self.__totalSeconds -= removed.getDurationInSeconds()
+        for node, child in path:
+            node.getSizes()[child] -= 1
+
+        # Unlink nodes left empty, from the leaf upwards.
+        node = leaf
+        while not node.getItems() and path:
+            if node.isLeaf():
+                if node.getPrev():
+                    node.getPrev().setNext(node.getNext())
+                if node.getNext():
+                    node.getNext().setPrev(node.getPrev())
+            parent, index = path.pop()
+            del parent.getKeys()[index]
+            del parent.getItems()[index]
+            del parent.getSizes()[index]
+            node = parent
+
+        if node.getItems() and index == 0:
+            self.updateFirstKeys(path, node.getKeys()[0])
+
+        while not self.__root.isLeaf() and len(self.__root.getItems()) == 1:
+            self.__root = self.__root.getItems()[0]
+        if not self.__root.isLeaf() and not self.__root.getItems():
+            self.__root = BTreeNode(True)
+        return removed
+
+    def buildStructure(self, tracks: list):
+
+        """
+        Builds the tree bottom-up from sorted tracks in linear time, filling
+        every node.
+        """
+
+        order = self.__order
+        level = []
+        previous = None
+        for start in range(0, len(tracks), order):
+            chunk = tracks[start:start + order]
+            leaf = BTreeNode(True, [track.getSortKey() for track in chunk], chunk)
+            if previous:
+                previous.setNext(leaf)
+                leaf.setPrev(previous)
+            previous = leaf
+            level.append(leaf)
+        sizes = [len(leaf.getItems()) for leaf in level]
+
+        while len(level) > 1:
+            parents = []
+            parentSizes = []
+            for start in range(0, len(level), order):
+                children = level[start:start + order]
+                childSizes = sizes[start:start + order]
+                parents.append(BTreeNode(False, [child.getKeys()[0] for child in children], children, childSizes))
+                parentSizes.append(sum(childSizes))
+            level = parents
+            sizes = parentSizes
+
+        self.__root = level[0] if level else BTreeNode(True)
+        self.__size = len(tracks)
+        self.__totalSeconds = sum(track.getDurationInSeconds() for track in tracks)
+
+    def iterLeaves(self, leaf: BTreeNode, index: int):
+
+        """
+        Yields tracks in sorted order from a position in a leaf, following the
+        leaf links.
+        """
+
+        while leaf:
+            items = leaf.getItems()
+            while index < len(items):
+                yield items[index]
+                index += 1
+            leaf = leaf.getNext()
+            index = 0
+
+    def iterFrom(self, index: int):
+        node = self.__root
+        index = max(index, 0)
+        if index >= self.__size:
+            return iter(())
+        while not node.isLeaf():
+            child = 0
+            sizes = node.getSizes()
+            while index >= sizes[child]:
+                index -= sizes[child]
+                child += 1
+            node = node.getItems()[child]
+        return self.iterLeaves(node, index)
+
+    def iterFromKey(self, key: tuple):
+        # Go to the child before the first one starting at or after the key;
+        # the run of matches may begin at the end of that child.
+        node = self.__root
+        while not node.isLeaf():
+            child = bisect.bisect_left(node.getKeys(), key) - 1
+            node = node.getItems()[child if child > 0 else 0]
+        return self.iterLeaves(node, bisect.bisect_left(node.getKeys(), key))
+
+    def getSize(self) -> int:
+        return self.__size
+
+    def getTotalSeconds(self) -> int:
+        return self.__totalSeconds
+
+    def select(self, index: int) -> Track:
+        if index < 0 or index >= self.__size:
+            return None
+        return next(self.iterFrom(index))
+
+    def rank(self, track: Track) -> int:
+        key = track.getSortKey()
+        position = 0
+        node = self.__root
+        while not node.isLeaf():
+            child = bisect.bisect_left(node.getKeys(), key) - 1
+            if child < 0:
+                child = 0
+            position += sum(node.getSizes()[:child])
+            node = node.getItems()[child]
+        return position + bisect.bisect_left(node.getKeys(), key)
+
+    def __setstate__(self, state: dict):
+
+        """
+        Restores a pickled library and relinks its leaves, which the nodes
+        leave out of the pickle.
+        """
+
+        self.__dict__.update(state)
+        level = [self.__root]
+        while level and not level[0].isLeaf():
+            level = [child for node in level for child in node.getItems()]
+        previous = None
+        for leaf in level:
+            leaf.setPrev(previous)
+            if previous:
+                previous.setNext(leaf)
+            previous = leaf
+
+    def getSortedTracks(self) -> list:
+        tracks = []
+        node = self.__root
+        while not node.isLeaf():
+            node = node.getItems()[0]
+        while node:
+            tracks += node.getItems()
+            node = node.getNext()
+        return tracks
@@ -0,0 +1,599 @@
+"""
+Micro-benchmarks for the music library data structures.
+
+Usage:
+    python Benchmark.py [benchmark] [size]
+
+Without arguments every benchmark runs with its default size.
+"""
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from TrackClass import Track
+from AVLTree import AVLTree
+from LibraryBackends import BACKENDS, createLibrary
+from TrackJournal import TrackJournal
+from SnapshotLibrary import SnapshotLibrary
+from QueueClass import MusicQueue
+from PlaylistClass import Playlist
+from PlaylistCatalog import PlaylistCatalog
+from PlaylistCache import PlaylistCache
+from WriteBehind import WriteBehind
+from JsonStream import readObject, writeObject
+from LibraryCache import cacheFile
+
+def makeTracks(count: int, seed: int = 2024) -> list:
+    """
+    Builds a shuffled list of synthetic tracks, with some repeated titles so
+    duplicate handling is exercised as well.
+
+    Parameters:
+        count (int): Number of tracks to generate.
+        seed (int): Seed for the random generator, for repeatable runs.
+
+    Returns:
+        list: The generated Track objects.
+    """
+    rng = random.Random(seed)
+    tracks = []
+    for i in range(count):
+        title = f"Title {rng.randrange(count // 2 + 1):07}"
+        artist = f"Artist {i:07}"
+        album = f"Album {rng.randrange(count // 10 + 1):06}"
+        duration = f"{rng.randrange(1, 10):02}:{rng.randrange(60):02}"
+        tracks += [Track(title, artist, album, duration)]
+    return tracks
+
+def timeIt(label: str, function) -> float:
+    """
+    Runs a function once and prints how long it took.
+
+    Returns:
+        float: Elapsed time in seconds.
+    """
+    start = time.perf_counter()
+    function()
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<40} {elapsed * 1000:10.1f} ms")
+    return elapsed
+
+def benchmarkInsertDelete(size: int = 100000):
+    """
+    Compares the recursive insert/delete (with the separate searchTrack walk
+    the old addTrack used) against the iterative insertIfAbsent/deleteIfPresent.
+    """
+    tracks = makeTracks(size)
+    print(f"\nInsert/delete of {size} tracks")
+
+    recursiveTree = AVLTree()
+    iterativeTree = AVLTree()
+
+    def recursiveAdd():
+        for track in tracks:
+            if recursiveTree.searchTrack(track.getTitle(), track.getArtist()) is None:
+                recursiveTree.setRoot(recursiveTree.insert(recursiveTree.getRoot(), track))
+
+    def iterativeAdd():
+        for track in tracks:
+            iterativeTree.insertIfAbsent(track)
+
+    def recursiveDelete():
+        for track in tracks:
+            recursiveTree.setRoot(recursiveTree.delete(recursiveTree.getRoot(), track))
+
+    def iterativeDelete():
+        for track in tracks:
+            iterativeTree.deleteIfPresent(track)
+
+    slow = timeIt("recursive search + insert", recursiveAdd)
+    fast = timeIt("iterative insertIfAbsent", iterativeAdd)
+    print(f"  speed-up: {slow / fast:.2f}x")
+    slow = timeIt("recursive delete", recursiveDelete)
+    fast = timeIt("iterative deleteIfPresent", iterativeDelete)
+    print(f"  speed-up: {slow / fast:.2f}x")
+
+def benchmarkBulkLoad(size: int = 200000):
+    """
+    Compares loading a sorted tracks.json with one insert per record against
+    the linear-time bulk build.
+    """
+    source = AVLTree()
+    source.buildFromSorted(makeTracks(size))
+    print(f"\nLoading {size} tracks from JSON")
+
+    with tempfile.TemporaryDirectory() as directory:
+        filename = os.path.join(directory, "tracks.json")
+        source.saveToJson(filename)
+
+        slow = timeIt("per-record insert", lambda: AVLTree().loadFromJson(filename, bulk=False))
+        fast = timeIt("bulk build", lambda: AVLTree().loadFromJson(filename))
+        print(f"  speed-up: {slow / fast:.2f}x")
+
+def benchmarkTrack(size: int = 200000):
+    """
+    Measures the memory taken by Track objects and the throughput of
+    compareTracks and getDurationInSeconds.
+    """
+    records = [track.toDict() for track in makeTracks(size)]
+    print(f"\nTrack representation with {size} tracks")
+
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    tracks = [Track.fromDict(record) for record in records]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    # The list holding the tracks is not part of a track's footprint.
+    perTrack = (after - before - sys.getsizeof(tracks)) / size
+    print(f"  {'memory per track (excluding shared strings)':<40} {perTrack:10.1f} bytes")
+
+    tree = AVLTree()
+    pairs = list(zip(tracks, reversed(tracks)))
+
+    def compare():
+        for first, second in pairs:
+            tree.compareTracks(first, second)
+
+    def durations():
+        for track in tracks:
+            track.getDurationInSeconds()
+
+    elapsed = timeIt("compareTracks", compare)
+    print(f"  {'compares per second':<40} {size / elapsed:10.0f}")
+    elapsed = timeIt("getDurationInSeconds", durations)
+    print(f"  {'durations per second':<40} {size / elapsed:10.0f}")
+
+def benchmarkSharedNames(size: int = 100000):
+    """
+    Measures memory retained after loading a library with few distinct
+    artists and albums, plus a queue holding every track twice, the way
+    Data/queue.json stores the queue and its original order.
+    """
+    from QueueClass import MusicQueue
+
+    rng = random.Random(7)
+    artists = [f"Artist {i:04}" for i in range(500)]
+    albums = [f"Album {i:04}" for i in range(2000)]
+    tracks = [Track(f"Title {i:07}", rng.choice(artists), rng.choice(albums),
+                    f"{rng.randrange(1, 10):02}:{rng.randrange(60):02}", rng.sample(artists, 2))
+              for i in range(size)]
+    source = AVLTree()
+    source.buildFromSorted(tracks)
+    print(f"\nLoading {size} tracks with {len(artists)} artists and {len(albums)} albums")
+
+    with tempfile.TemporaryDirectory() as directory:
+        filename = os.path.join(directory, "tracks.json")
+        source.saveToJson(filename)
+        del source, tracks
+
+        tracemalloc.start()
+        library = AVLTree()
+        library.loadFromJson(filename)
+        libraryBytes = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        print(f"  {'library bytes per track':<40} {libraryBytes / size:10.1f}")
+
+        queue = MusicQueue()
+        for track in library:
+            queue.addTrack(track)
+        cwd = os.getcwd()
+        os.makedirs(os.path.join(directory, "Data"))
+        os.chdir(directory)
+        try:
+            queue.saveState()
+            tracemalloc.start()
+            loaded = MusicQueue()
+            loaded.loadState()
+            queueBytes = tracemalloc.get_traced_memory()[0]
+            tracemalloc.stop()
+        finally:
+            os.chdir(cwd)
+        print(f"  {'queue bytes per entry (queue + orig)':<40} {queueBytes / size:10.1f}")
+
+def benchmarkBackends(size: int = 100000):
+    """
+    Runs the same workloads against every library backend, checks that they
+    all return the same results, and prints which backend wins each workload.
+    The randomized correctness check is test_backends.py.
+    """
+    tracks = makeTracks(size)
+    extra = makeTracks(size // 10, seed=99)
+    rng = random.Random(5)
+    lookups = [rng.choice(tracks) for _ in range(size // 2)]
+    pages = [rng.randrange(1, size // 10) for _ in range(2000)]
+    prefixes = [track.getTitle()[:11] for track in lookups[:2000]]
+    removals = rng.sample(tracks, size // 10)
+
+    workloads = {
+        "bulk build": lambda library: library.buildFromSorted(list(tracks)),
+        "add tracks": lambda library: [library.addTrack(track) for track in extra],
+        "lookup title+artist": lambda library: [library.searchTrack(track.getTitle(), track.getArtist()) for track in lookups],
+        "full sorted scan": lambda library: library.getSortedTracks(),
+        "random page": lambda library: [list(library.getPage(page)) for page in pages],
+        "prefix query": lambda library: [list(library.iterPrefix(prefix)) for prefix in prefixes],
+        "remove tracks": lambda library: [library.removeTrack(track) for track in removals],
+    }
+
+    print(f"\nBackend matrix with {size} tracks (ms)")
+    print(f"  {'workload':<22}" + "".join(f"{name:>10}" for name in BACKENDS) + "    winner")
+    libraries = {name: createLibrary(name) for name in BACKENDS}
+    results = {}
+
+    with tempfile.TemporaryDirectory() as directory:
+        # removeTrack also updates playlists on disk; keep that out of Data/.
+        cwd = os.getcwd()
+        os.makedirs(os.path.join(directory, "Data", "Playlists"))
+        os.chdir(directory)
+        try:
+            for workload, function in workloads.items():
+                timings = {}
+                for name, library in libraries.items():
+                    start = time.perf_counter()
+                    results[name] = function(library)
+                    timings[name] = time.perf_counter() - start
+                reference = results["avl"]
+                for name in BACKENDS:
+                    if results[name] != reference:
+                        print(f"  MISMATCH: {name} disagrees with avl on '{workload}'")
+                winner = min(timings, key=timings.get)
+                print(f"  {workload:<22}" + "".join(f"{timings[name] * 1000:10.1f}" for name in BACKENDS) + f"    {winner}")
+        finally:
+            os.chdir(cwd)
+
+    final = [library.getSortedTracks() for library in libraries.values()]
+    print("  all backends agree" if all(tracks == final[0] for tracks in final) else "  FINAL CONTENTS DIFFER")
+
+def benchmarkJournal(size: int = 100000, edits: int = 50):
+    """
+    Compares saving one edit at a time by rewriting tracks.json against
+    appending it to the journal, and times one compaction.
+    """
+    tracks = makeTracks(size)
+    extra = makeTracks(edits, seed=7)
+    print(f"\n{edits} single-track edits on a {size}-track library")
+
+    with tempfile.TemporaryDirectory() as directory:
+        snapshot = os.path.join(directory, "tracks.json")
+
+        rewritten = AVLTree()
+        rewritten.buildFromSorted(list(tracks))
+
+        def rewriteEach():
+            for track in extra:
+                rewritten.addTrack(track)
+                rewritten.saveToJson(snapshot)
+
+        journal = TrackJournal(snapshot, os.path.join(directory, "tracks.journal"), compactBytes=1 << 30)
+        journaled = AVLTree()
+        journaled.setStorage(journal)
+        journaled.buildFromSorted(list(tracks))
+
+        def journalEach():
+            for track in extra:
+                journaled.addTrack(track)
+                journaled.saveToJson()
+
+        slow = timeIt("rewrite tracks.json per edit", rewriteEach)
+        fast = timeIt("append to journal per edit", journalEach)
+        print(f"  speed-up: {slow / fast:.2f}x")
+        timeIt("compaction (foreground)", lambda: journal.compact(journaled.getSortedTracks(), background=False))
+        journal.close()
+
+def benchmarkSnapshot(size: int = 200000):
+    """
+    Compares starting up from tracks.json against mapping the binary
+    snapshot, up to showing the first page and looking up one track.
+    """
+    source = AVLTree()
+    source.buildFromSorted(makeTracks(size))
+    probe = source.select(size // 2)
+    print(f"\nStartup with {size} tracks")
+
+    with tempfile.TemporaryDirectory() as directory:
+        filename = os.path.join(directory, "tracks.json")
+        source.saveToJson(filename)
+        SnapshotLibrary().loadFromJson(filename)
+
+        def start(library):
+            library.loadFromJson(filename)
+            library.displayPage(1)
+            library.searchTrack(probe.getTitle(), probe.getArtist())
+
+        slow = timeIt("JSON load + bulk build (avl)", lambda: start(AVLTree()))
+        fast = timeIt("map snapshot", lambda: start(SnapshotLibrary()))
+        print(f"  speed-up: {slow / fast:.2f}x")
+        print(f"  {'tracks.json size':<40} {os.path.getsize(filename) / 1e6:10.1f} MB")
+        print(f"  {'tracks.snap size':<40} {os.path.getsize(SnapshotLibrary.snapshotFile(filename)) / 1e6:10.1f} MB")
+
+def benchmarkStreamLoad(size: int = 200000):
+    """
+    Compares peak memory and time of loading tracks.json with json.load
+    against the streaming reader, and the size of indented and compact files.
+    """
+    source = AVLTree()
+    source.buildFromSorted(makeTracks(size))
+    print(f"\nStreaming load of {size} tracks")
+
+    with tempfile.TemporaryDirectory() as directory:
+        filename = os.path.join(directory, "tracks.json")
+        source.saveToJson(filename)
+
+        def wholeDocument():
+            with open(filename, 'r') as file:
+                data = json.load(file)
+            AVLTree().buildFromSorted([Track.fromDict(trackData) for trackData in data])
+
+        for label, function in (("json.load + build", wholeDocument),
+                                ("streaming loadFromJson", lambda: AVLTree().loadFromJson(filename))):
+            tracemalloc.start()
+            timeIt(label, function)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            print(f"  {'  peak memory':<40} {peak / 1e6:10.1f} MB")
+
+        indented = os.path.getsize(filename)
+        os.environ["MUSIC_JSON_COMPACT"] = "1"
+        try:
+            timeIt("compact saveToJson", lambda: source.saveToJson(filename))
+        finally:
+            del os.environ["MUSIC_JSON_COMPACT"]
+        print(f"  {'file size indented / compact':<40} {indented / 1e6:7.1f} / {os.path.getsize(filename) / 1e6:.1f} MB")
+
+def benchmarkCache(size: int = 200000):
+    """
+    Compares a cold start (parse tracks.json and build) against loading the
+    pickled cache of the built library, for every backend that caches. Each
+    start runs in a fresh interpreter, so nothing is shared between them.
+    """
+    source = AVLTree()
+    source.buildFromSorted(makeTracks(size))
+    print(f"\nStartup from cache with {size} tracks")
+
+    with tempfile.TemporaryDirectory() as directory:
+        filename = os.path.join(directory, "tracks.json")
+        source.saveToJson(filename)
+        here = os.path.dirname(os.path.abspath(__file__))
+        script = ("import sys, time; sys.path.insert(0, sys.argv[1]); from LibraryBackends import createLibrary; "
+                  "start = time.perf_counter(); createLibrary(sys.argv[3]).loadFromJson(sys.argv[2]); "
+                  "print(time.perf_counter() - start)")
+
+        def start(backend: str, label: str) -> float:
+            output = subprocess.run([sys.executable, "-c", script, here, filename, backend],
+                                    capture_output=True, text=True, check=True).stdout
+            elapsed = float(output.split()[-1])
+            print(f"  {backend + ' ' + label:<50} {elapsed * 1000:10.1f} ms")
+            return elapsed
+
+        for backend, libraryClass in BACKENDS.items():
+            if not libraryClass.CACHEABLE:
+                continue
+            if os.path.exists(cacheFile(filename)):
+                os.remove(cacheFile(filename))
+            cold = start(backend, "cold start (parse + build + write cache)")
+            if not os.path.exists(cacheFile(filename)):
+                print(f"  {backend}: no cache was written")
+                continue
+            cached = start(backend, "cached start")
+            print(f"  {backend} speed-up: {cold / cached:.2f}x")
+
+def benchmarkWriteBehind(size: int = 1000, commands: int = 20):
+    """
+    Compares filling the queue from the library and running some queue
+    commands with a save after every step, as the menus used to, against
+    marking the queue dirty and letting the write-behind writer save it.
+    """
+    tracks = makeTracks(size)
+    print(f"\nEnqueue {size} tracks and run {commands} queue commands")
+    previous = os.getcwd()
+
+    with tempfile.TemporaryDirectory() as directory:
+        os.chdir(directory)
+        os.mkdir("Data")
+        try:
+            def saveEach():
+                queue = MusicQueue()
+                for track in tracks:
+                    queue.addTrack(track)
+                    queue.saveState()
+                for _ in range(commands):
+                    queue.nextTrack()
+                    queue.saveState()
+
+            def writeBehind():
+                writer = WriteBehind(delay=60)
+                MusicQueue.useWriteBehind(writer)
+                queue = MusicQueue()
+                for track in tracks:
+                    queue.addTrack(track)
+                queue.markDirty()
+                for _ in range(commands):
+                    queue.nextTrack()
+                    queue.markDirty()
+                writer.close()
+                MusicQueue.useWriteBehind(None)
+
+            slow = timeIt("save after every step", saveEach)
+            fast = timeIt("write-behind, flushed on close", writeBehind)
+            print(f"  speed-up: {slow / fast:.2f}x")
+        finally:
+            os.chdir(previous)
+
+def benchmarkPlaylist(size: int = 100000, operations: int = 200):
+    """
+    Compares playlist files that embed every track against ID lists
+    resolved through the library, then membership checks and removals
+    through the playlist's key index against scanning a list.
+    """
+    tracks = makeTracks(size)
+    probes = random.Random(3).sample(tracks, operations)
+    library = AVLTree()
+    library.buildFromSorted(list(tracks))
+    print(f"\nPlaylist with {size} tracks, {operations} lookups and removals")
+    previous = os.getcwd()
+
+    with tempfile.TemporaryDirectory() as directory:
+        os.chdir(directory)
+        os.makedirs("Data/Playlists")
+        writer = WriteBehind(delay=60)
+        Playlist.useWriteBehind(writer)
+        Playlist.useLibrary(lambda: library)
+        # Measure parsing the file, not the cache of loaded playlists.
+        Playlist.useCache(PlaylistCache(0))
+        try:
+            playlist = Playlist("big")
+            for track in tracks:
+                playlist.insertTrack(track)
+            playlist.saveToJson()
+            embedded = "Data/Playlists/embedded.json"
+            writeObject(embedded, {"name": "embedded", "tracks": (track.toDict() for track in tracks)},
+                        indent=2, streamKeys=("tracks",))
+
+            def parseEmbedded():
+                for key, value in readObject(embedded, ("tracks",)):
+                    if key == "tracks":
+                        [Track.fromDict(data) for data in value]
+
+            timeIt("build track ID map (once per session)", lambda: library.getTrackById(""))
+            loaded = [None]
+            slow = timeIt("load embedded tracks (old format)", parseEmbedded)
+            fast = timeIt("load ID list", lambda: loaded.__setitem__(0, Playlist.loadFromJson("big")))
+            print(f"  speed-up: {slow / fast:.2f}x")
+            oldSize = os.path.getsize(embedded)
+            newSize = os.path.getsize("Data/Playlists/big.json")
+            print(f"  {'file size (old format)':<40} {oldSize / 1e6:10.1f} MB")
+            print(f"  {'file size (ID list)':<40} {newSize / 1e6:10.1f} MB ({oldSize / newSize:.1f}x smaller)")
+            playlist = loaded[0]
+            listed = playlist.getTracks()
+
+            slow = timeIt("contains (list scan)", lambda: [track in listed for track in probes])
+            fast = timeIt("contains (key index)", lambda: [playlist.hasTrack(track) for track in probes])
+            print(f"  speed-up: {slow / fast:.2f}x")
+
+            def removeScanning():
+                remaining = listed
+                for track in probes:
+                    remaining = [other for other in remaining if other is not track]
+
+            def removeIndexed():
+                for track in probes:
+                    playlist.removeTrackByKey(track.getSortKey())
+
+            slow = timeIt("remove (list rebuild)", removeScanning)
+            fast = timeIt("remove (key index)", removeIndexed)
+            print(f"  speed-up: {slow / fast:.2f}x")
+            writer.discard("playlist:big")
+        finally:
+            writer.close()
+            Playlist.useWriteBehind(None)
+            Playlist.useLibrary(None)
+            Playlist.useCache(PlaylistCache())
+            os.chdir(previous)
+
+def benchmarkCatalog(count: int = 2000, queries: int = 1000):
+    """
+    Compares answering "does this playlist exist" and listing the playlists
+    with their track counts by reading the directory and files each time
+    against the in-memory catalog.
+    """
+    tracks = makeTracks(20)
+    names = [f"Playlist {i:05}" for i in range(count)]
+    probes = random.Random(5).choices(names, k=queries)
+    print(f"\n{queries} lookups and one full listing over {count} playlists")
+
+    with tempfile.TemporaryDirectory() as directory:
+        for name in names:
+            writeObject(os.path.join(directory, name + ".json"), {
+                "name": name,
+                "total_seconds": sum(track.getDurationInSeconds() for track in tracks),
+                "tracks": (track.getId() for track in tracks)
+            }, indent=2, streamKeys=("tracks",))
+
+        def listDirectory() -> list:
+            return [file[:-5] for file in os.listdir(directory) if len(file) > 5 and file[-5:] == ".json"]
+
+        def scanFiles():
+            for name in probes:
+                name in listDirectory()
+            for name in listDirectory():
+                PlaylistCatalog.readEntry(os.path.join(directory, name + ".json"), 0)
+
+        catalog = PlaylistCatalog(directory)
+        timeIt("build catalog (once per session)", catalog.refresh)
+
+        def queryCatalog():
+            for name in probes:
+                catalog.getEntry(name)
+            for name in catalog.getNames():
+                catalog.getEntry(name)
+
+        slow = timeIt("list directory / read files", scanFiles)
+        fast = timeIt("catalog", queryCatalog)
+        print(f"  speed-up: {slow / fast:.2f}x")
+
+def benchmarkPlaylistCache(size: int = 20000, loads: int = 30):
+    """
+    Compares opening the same playlist repeatedly by parsing its file each
+    time against the cache of loaded playlists.
+    """
+    tracks = makeTracks(size)
+    library = AVLTree()
+    library.buildFromSorted(list(tracks))
+    library.getTrackById("")
+    print(f"\n{loads} loads of a {size}-track playlist")
+    previous = os.getcwd()
+
+    with tempfile.TemporaryDirectory() as directory:
+        os.chdir(directory)
+        os.makedirs("Data/Playlists")
+        Playlist.useLibrary(lambda: library)
+        try:
+            playlist = Playlist("hot")
+            for track in tracks:
+                playlist.insertTrack(track)
+            playlist.saveToJson()
+
+            def loadAll():
+                for _ in range(loads):
+                    Playlist.loadFromJson("hot")
+
+            Playlist.useCache(PlaylistCache(0))
+            slow = timeIt("parse every time", loadAll)
+            Playlist.useCache(PlaylistCache())
+            fast = timeIt("cached (first load parses)", loadAll)
+            print(f"  speed-up: {slow / fast:.2f}x")
+        finally:
+            Playlist.useCache(PlaylistCache())
+            Playlist.useLibrary(None)
+            os.chdir(previous)
+
+BENCHMARKS = {
+    "insertDelete": benchmarkInsertDelete,
+    "bulkLoad": benchmarkBulkLoad,
+    "track": benchmarkTrack,
+    "sharedNames": benchmarkSharedNames,
+    "backends": benchmarkBackends,
+    "journal": benchmarkJournal,
+    "snapshot": benchmarkSnapshot,
+    "streamLoad": benchmarkStreamLoad,
+    "cache": benchmarkCache,
+    "writeBehind": benchmarkWriteBehind,
+    "playlist": benchmarkPlaylist,
+    "catalog": benchmarkCatalog,
+    "playlistCache": benchmarkPlaylistCache,
+}
+
+if __name__ == "__main__":
+    names = sys.argv[1:2] or list(BENCHMARKS)
+    for name in names:
+        if name not in BENCHMARKS:
+            print(f"Unknown benchmark '{name}'. Choose from: {', '.join(BENCHMARKS)}")
+            continue
+        if len(sys.argv) > 2:
+            BENCHMARKS[name](int(sys.argv[2]))
+        else:
+            BENCHMARKS[name]()
@@ -0,0 +1,47 @@
+import json
+import os
+
+# Default value of every setting. The type of the default decides how an
+# environment override is converted.
+DEFAULTS = {
+    "library_backend": "avl",
+    "btree_order": 64,
+    "storage": "json",
+    "sqlite_path": "Data/music.db",
+    "journal": False,
+    "journal_compact_bytes": 1 << 20,
+    "startup_timing": False,
+    "json_compact": False,
+    "library_cache": True,
+    "write_delay": 2.0,
+    "playlist_cache_tracks": 200000,
+}
+
+def getSetting(name: str, filename: str = "Data/config.json"):
+    """
+    Looks up a configuration setting. An environment variable named
+    MUSIC_<NAME> wins over Data/config.json, which wins over DEFAULTS.
+
+    Parameters:
+        name (str): The setting name, e.g. "library_backend".
+        filename (str): The JSON configuration file.
+
+    Returns:
+        The configured value, or the default if it is not set anywhere.
+    """
+    default = DEFAULTS.get(name)
+    env = os.environ.get("MUSIC_" + name.upper())
+    if env is not None:
+        if isinstance(default, bool):
+            return env.lower() in ("1", "true", "yes", "y")
+        if isinstance(default, int):
+            return int(env)
+        if isinstance(default, float):
+            return float(env)
+        return env
+
+    try:
+        with open(filename, 'r') as file:
+            return json.load(file).get(name, default)
+    except FileNotFoundError:
+        return default
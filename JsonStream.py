@@ -0,0 +1,207 @@
+import json
+import os
+from Config import getSetting
+
+class JsonStreamReader:
+    """
+    Incremental JSON reader that parses a file in chunks, so large arrays can
+    be consumed one element at a time without holding the whole document.
+    Each element is decoded with the standard json decoder.
+    """
+
+    def __init__(self, file, chunkSize: int = 1 << 16):
+        self.__file = file
+        self.__chunkSize = chunkSize
+        self.__buffer = ""
+        self.__position = 0
+        self.__eof = False
+        self.__decoder = json.JSONDecoder()
+
+    def fill(self) -> bool:
+        """
+        Reads the next chunk, dropping what was already parsed.
+
+        Returns:
+            bool: False at the end of the file.
+        """
+        if self.__eof:
+            return False
+        chunk = self.__file.read(self.__chunkSize)
+        self.__buffer = self.__buffer[self.__position:] + chunk
+        self.__position = 0
+        if not chunk:
+            self.__eof = True
+        return bool(chunk)
+
+    def peek(self) -> str:
+        """
+        Skips whitespace and returns the next character, or "" at the end.
+        """
+        while True:
+            while self.__position < len(self.__buffer) and self.__buffer[self.__position] in " \t\r\n":
+                self.__position += 1
+            if self.__position < len(self.__buffer) or not self.fill():
+                return self.__buffer[self.__position:self.__position + 1]
+
+    def expect(self, char: str):
+        if self.peek() != char:
+            raise json.JSONDecodeError(f"Expecting '{char}'", self.__buffer, self.__position)
+        self.__position += 1
+
+    def readValue(self):
+        """
+        Decodes the next complete JSON value.
+        """
+        self.peek()
+        while True:
+            try:
+                value, end = self.__decoder.raw_decode(self.__buffer, self.__position)
+                # A number cut off by the end of the buffer ("2." of "2.5") still
+                # decodes; only trust it once something other than a digit follows.
+                number = isinstance(value, (int, float)) and not isinstance(value, bool)
+                if not number or self.__eof or self.__buffer[end:].strip("0123456789.eE+-"):
+                    self.__position = end
+                    return value
+            except json.JSONDecodeError:
+                if self.__eof:
+                    raise
+            self.fill()
+
+    def iterArray(self):
+        """
+        Yields the elements of the array that starts at the current position.
+        """
+        self.expect("[")
+        if self.peek() == "]":
+            self.__position += 1
+            return
+        while True:
+            yield self.readValue()
+            if self.peek() == ",":
+                self.__position += 1
+            else:
+                self.expect("]")
+                return
+
+    def iterObject(self, streamKeys: tuple = ()):
+        """
+        Yields the (key, value) pairs of the object that starts at the current
+        position. For keys in streamKeys the value must be an array and is
+        yielded as an iterator over its elements; it is read while the caller
+        consumes it, and skipped if the caller does not.
+        """
+        self.expect("{")
+        if self.peek() == "}":
+            self.__position += 1
+            return
+        while True:
+            key = self.readValue()
+            self.expect(":")
+            if key in streamKeys:
+                elements = self.iterArray()
+                yield key, elements
+                for _ in elements:
+                    pass
+            else:
+                yield key, self.readValue()
+            if self.peek() == ",":
+                self.__position += 1
+            else:
+                self.expect("}")
+                return
+
+def readArray(filename: str):
+    """
+    Yields the elements of a JSON file holding one top-level array.
+
+    Raises:
+        FileNotFoundError: If the file does not exist.
+    """
+    with open(filename, 'r') as file:
+        yield from JsonStreamReader(file).iterArray()
+
+def readObject(filename: str, streamKeys: tuple = ()):
+    """
+    Yields the (key, value) pairs of a JSON file holding one top-level
+    object, streaming the arrays under streamKeys (see iterObject).
+
+    Raises:
+        FileNotFoundError: If the file does not exist.
+    """
+    with open(filename, 'r') as file:
+        yield from JsonStreamReader(file).iterObject(streamKeys)
+
+def isCompact() -> bool:
+    """
+    Returns:
+        bool: True if the "json_compact" setting asks for files without indentation.
+    """
+    return bool(getSetting("json_compact"))
+
+def encodeValue(value, indent: int | None, depth: int) -> str:
+    """
+    Encodes a value the way json.dump would at the given nesting depth.
+    """
+    if indent is None:
+        return json.dumps(value, separators=(",", ":"))
+    # JSON strings never contain raw newlines, so indenting every line is safe.
+    return json.dumps(value, indent=indent).replace("\n", "\n" + " " * (indent * depth))
+
+def writeElements(file, elements, indent: int | None, depth: int):
+    """
+    Writes an array one element at a time, so the whole document is never
+    built in memory.
+    """
+    if indent is None:
+        separator, opening, closing = ",", "[", "]"
+    else:
+        separator = ",\n" + " " * (indent * (depth + 1))
+        opening = "[\n" + " " * (indent * (depth + 1))
+        closing = "\n" + " " * (indent * depth) + "]"
+
+    empty = True
+    for element in elements:
+        file.write(opening if empty else separator)
+        file.write(encodeValue(element, indent, depth + 1))
+        empty = False
+    file.write("[]" if empty else closing)
+
+def writeArray(filename: str, elements, indent: int | None = 2, sync: bool = False):
+    """
+    Writes an iterable of JSON values as an array, element by element.
+
+    Parameters:
+        filename (str): The file to write.
+        elements: The values, e.g. a generator of track dictionaries.
+        indent (int | None): Indentation like json.dump, or None for the
+        compact form. Ignored when the "json_compact" setting is on.
+        sync (bool): Force the file to disk before returning.
+    """
+    indent = None if isCompact() else indent
+    with open(filename, 'w') as file:
+        writeElements(file, elements, indent, 0)
+        if sync:
+            file.flush()
+            os.fsync(file.fileno())
+
+def writeObject(filename: str, fields: dict, indent: int | None = 2, streamKeys: tuple = ()):
+    """
+    Writes a dictionary as a JSON object. The values under streamKeys are
+    iterables written element by element as arrays.
+    """
+    indent = None if isCompact() else indent
+    with open(filename, 'w') as file:
+        file.write("{" if indent is None else "{\n")
+        first = True
+        for key, value in fields.items():
+            if not first:
+                file.write("," if indent is None else ",\n")
+            first = False
+            if indent is not None:
+                file.write(" " * indent)
+            file.write(json.dumps(key) + (":" if indent is None else ": "))
+            if key in streamKeys:
+                writeElements(file, value, indent, 1)
+            else:
+                file.write(encodeValue(value, indent, 1))
+        file.write("}" if indent is None else "\n}")
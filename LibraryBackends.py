@@ -0,0 +1,70 @@
+from Config import getSetting
+from LibraryContainer import LibraryContainer
+from AVLTree import AVLTree
+from SortedArrayLibrary import SortedArrayLibrary
+from BTreeLibrary import BTreeLibrary
+from SnapshotLibrary import SnapshotLibrary
+from TrackJournal import TrackJournal
+
+BACKENDS = {
+    "avl": AVLTree,
+    "sorted": SortedArrayLibrary,
+    "btree": BTreeLibrary,
+    "snapshot": SnapshotLibrary,
+}
+
+def createLibrary(backend: str | None = None) -> LibraryContainer:
+    """
+    Creates an empty music library using the configured backend.
+
+    Parameters:
+        backend (str | None): "avl", "sorted", "btree" or "snapshot"; None reads the
+        "library_backend" setting.
+
+    Returns:
+        LibraryContainer: The new, empty library.
+    """
+    name = backend or getSetting("library_backend")
+    if name not in BACKENDS:
+        print(f"Unknown library backend '{name}', using 'avl'.")
+        name = "avl"
+
+    if name == "btree":
+        return BTreeLibrary(getSetting("btree_order"))
+    return BACKENDS[name]()
+
+def createStorage():
+    """
+    Opens the configured storage engine. A new SQLite database is filled from
+    the existing JSON files the first time it is opened.
+
+    Returns:
+        SQLiteStorage | None: The database for the "sqlite" engine, or None
+        for the default "json" engine, which keeps the plain JSON files.
+    """
+    engine = getSetting("storage")
+    if engine == "json":
+        return None
+    if engine != "sqlite":
+        print(f"Unknown storage engine '{engine}', using 'json'.")
+        return None
+
+    # Imported here so the JSON engine never loads sqlite3.
+    from SQLiteStorage import SQLiteStorage
+    storage = SQLiteStorage(getSetting("sqlite_path"))
+    if storage.isNew():
+        storage.importJson()
+    return storage
+
+def createJournal():
+    """
+    Opens the library journal when the "journal" setting is on. It is used
+    with the JSON engine, so track edits are appended instead of rewriting
+    tracks.json.
+
+    Returns:
+        TrackJournal | None: The journal, or None when journaling is off.
+    """
+    if not getSetting("journal"):
+        return None
+    return TrackJournal(compactBytes=getSetting("journal_compact_bytes"))
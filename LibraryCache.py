@@ -0,0 +1,93 @@
+import gc
+import hashlib
+import os
+import pickle
+from contextlib import contextmanager
+
+# Bumped whenever the pickled layout of the library classes changes.
+CACHE_VERSION = 2
+
+@contextmanager
+def pausedGarbageCollector():
+    """
+    Pauses the cyclic garbage collector. Loading the cache creates a huge
+    number of objects that are all kept, and every collection triggered on
+    the way would scan the whole heap for nothing.
+    """
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+def cacheFile(filename: str) -> str:
+    """
+    Returns:
+        str: The cache path kept next to a JSON file, e.g. Data/tracks.cache.
+    """
+    return os.path.splitext(filename)[0] + ".cache"
+
+def fingerprint(filename: str) -> dict:
+    """
+    Identifies the exact contents of a source file by its size, modification
+    time and SHA-256 hash.
+    """
+    info = os.stat(filename)
+    digest = hashlib.sha256()
+    with open(filename, 'rb') as file:
+        for chunk in iter(lambda: file.read(1 << 20), b""):
+            digest.update(chunk)
+    return {"version": CACHE_VERSION, "size": info.st_size, "mtime": info.st_mtime_ns, "hash": digest.hexdigest()}
+
+def readCache(filename: str, backend: type):
+    """
+    Loads the library cached for a source file.
+
+    Parameters:
+        filename (str): The source JSON file.
+        backend (type): The library class the cache must have been built with.
+
+    Returns:
+        LibraryContainer | None: The cached library, or None if there is no
+        cache or it is stale, built with another backend, or unreadable.
+    """
+    try:
+        with open(cacheFile(filename), 'rb') as file:
+            header = pickle.load(file)
+            if header.get("backend") != backend.__name__:
+                return None
+            # Cheap checks first; only hash the source if size and mtime match.
+            info = os.stat(filename)
+            if header.get("size") != info.st_size or header.get("mtime") != info.st_mtime_ns:
+                return None
+            header.pop("backend")
+            if header != fingerprint(filename):
+                return None
+            with pausedGarbageCollector():
+                library = pickle.load(file)
+    except FileNotFoundError:
+        return None
+    except Exception:
+        # Corrupt or written by incompatible code: rebuild instead.
+        return None
+    return library if type(library) is backend else None
+
+def writeCache(library, filename: str):
+    """
+    Stores a built library as the cache for its source file. The cache is
+    replaced atomically; failing to write it is not an error.
+    """
+    header = fingerprint(filename)
+    header["backend"] = type(library).__name__
+    target = cacheFile(filename)
+    temporary = target + ".tmp"
+    try:
+        with open(temporary, 'wb') as file:
+            pickle.dump(header, file, protocol=pickle.HIGHEST_PROTOCOL)
+            pickle.dump(library, file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporary, target)
+    except (OSError, TypeError, pickle.PicklingError):
+        if os.path.exists(temporary):
+            os.remove(temporary)
@@ -0,0 +1,754 @@
+from TrackClass import Track
+from PlaylistClass import Playlist
+from SearchIndex import SearchIndex
+from SecondaryIndex import SecondaryIndex
+from JsonStream import readArray, writeArray
+from Config import getSetting
+from LibraryCache import readCache, writeCache, pausedGarbageCollector
+from abc import ABC, abstractmethod
+import bisect
+import io
+import os
+
+class LibraryContainer(ABC):
+    """
+    Ordered collection of the music library's tracks, sorted by title, artist,
+    album and duration.
+
+    Backends (AVLTree, SortedArrayLibrary, BTreeLibrary) only implement the
+    abstract structural primitives below; indexing, lookups, listing and JSON
+    persistence are shared here so every backend behaves the same.
+    """
+
+    # Whether loadFromJson may keep a pickled copy of the built library next
+    # to the JSON file (see LibraryCache).
+    CACHEABLE = True
+
+    def __init__(self):
+        # Each index is built by the first lookup that needs it and then
+        # kept current; None means not built yet.
+        self.__searchIndex = None
+        self.__artistIndex = None
+        self.__albumIndex = None
+        # Track ID -> track, built by the first getTrackById call.
+        self.__idIndex = None
+        self.__storage = None
+
+    def setStorage(self, storage):
+        
+        """
+        Keeps the library in a storage engine (SQLiteStorage or TrackJournal)
+        instead of rewriting tracks.json. Each add and remove is then written
+        as it happens, loadFromJson reads from the engine and saveToJson only
+        gives it a chance to checkpoint.
+        
+        Parameters:
+            storage: The storage engine, or None for the JSON file.
+        """
+        
+        self.__storage = storage
+
+    def getStorage(self):
+        return self.__storage
+
+    @abstractmethod
+    def insertIfAbsent(self, track: Track) -> bool:
+        
+        """
+        Inserts a track unless one with the same title and artist exists.
+        Structure only; addTrack also updates the indexes.
+        
+        Returns:
+            bool: True if the track was inserted.
+        """
+        
+        raise NotImplementedError
+
+    @abstractmethod
+    def deleteIfPresent(self, track: Track) -> Track:
+        
+        """
+        Deletes the track with the same sort key. Structure only; removeTrack
+        also updates the indexes and playlists.
+        
+        Returns:
+            Track: The track object that was removed, or None if not found.
+        """
+        
+        raise NotImplementedError
+
+    @abstractmethod
+    def buildStructure(self, tracks: list):
+        
+        """
+        Replaces the contents with tracks that are already in sorted order.
+        """
+        
+        raise NotImplementedError
+
+    @abstractmethod
+    def iterFrom(self, index: int):
+        
+        """
+        Yields tracks in sorted order starting at a 0-based position.
+        """
+        
+        raise NotImplementedError
+
+    @abstractmethod
+    def iterFromKey(self, key: tuple):
+        
+        """
+        Yields tracks in sorted order starting at the first one whose sort key
+        is not less than the given (possibly partial) key.
+        """
+        
+        raise NotImplementedError
+
+    @abstractmethod
+    def getSize(self) -> int:
+        
+        """
+        Returns:
+            int: The number of tracks in the library.
+        """
+        
+        raise NotImplementedError
+
+    @abstractmethod
+    def getTotalSeconds(self) -> int:
+        
+        """
+        Returns:
+            int: The total duration of all tracks in seconds.
+        """
+        
+        raise NotImplementedError
+
+    @abstractmethod
+    def select(self, index: int) -> Track:
+        
+        """
+        Returns:
+            Track: The track at a 0-based position of the sorted order, or None.
+        """
+        
+        raise NotImplementedError
+
+    @abstractmethod
+    def rank(self, track: Track) -> int:
+        
+        """
+        Returns:
+            int: The number of tracks that sort before the given track.
+        """
+        
+        raise NotImplementedError
+
+    def indexTrack(self, track: Track):
+        
+        """
+        Records a track in the indexes built so far, and registers it as the
+        instance playlist and queue loaders reuse.
+        
+        Parameters:
+            track (Track): The track that was just added to the library.
+        """
+        
+        Track.register(track)
+        if self.__idIndex is not None:
+            self.__idIndex[track.getId()] = track
+        if self.__searchIndex is not None:
+            self.__searchIndex.addTrack(track)
+        if self.__artistIndex is not None:
+            self.__artistIndex.addTrack(track)
+        if self.__albumIndex is not None:
+            self.__albumIndex.addTrack(track)
+
+    def unindexTrack(self, track: Track):
+        
+        """
+        Drops a track from the indexes built so far.
+        
+        Parameters:
+            track (Track): The track that was just removed from the library.
+        """
+        
+        if self.__idIndex is not None:
+            self.__idIndex.pop(track.getId(), None)
+        if self.__searchIndex is not None:
+            self.__searchIndex.removeTrack(track)
+        if self.__artistIndex is not None:
+            self.__artistIndex.removeTrack(track)
+        if self.__albumIndex is not None:
+            self.__albumIndex.removeTrack(track)
+
+    def invalidateIndexes(self):
+        
+        """
+        Drops every index after the contents were replaced. Each one is
+        rebuilt by the first lookup that needs it, so loading a library does
+        not pay for indexes that may never be used.
+        """
+        
+        self.__searchIndex = None
+        self.__artistIndex = None
+        self.__albumIndex = None
+        self.__idIndex = None
+
+    def getSearchIndex(self) -> SearchIndex:
+        
+        """
+        Returns:
+            SearchIndex: The keyword index, built in one in-order pass on first use.
+        """
+        
+        if self.__searchIndex is None:
+            index = SearchIndex()
+            for track in self:
+                index.addTrack(track)
+            self.__searchIndex = index
+        return self.__searchIndex
+
+    def getArtistIndex(self) -> SecondaryIndex:
+        
+        """
+        Returns:
+            SecondaryIndex: The artist index, built in one in-order pass on first use.
+        """
+        
+        if self.__artistIndex is None:
+            index = SecondaryIndex(SecondaryIndex.artistKeys)
+            index.rebuild(self)
+            self.__artistIndex = index
+        return self.__artistIndex
+
+    def getAlbumIndex(self) -> SecondaryIndex:
+        
+        """
+        Returns:
+            SecondaryIndex: The album index, built in one in-order pass on first use.
+        """
+        
+        if self.__albumIndex is None:
+            index = SecondaryIndex(SecondaryIndex.albumKeys)
+            index.rebuild(self)
+            self.__albumIndex = index
+        return self.__albumIndex
+
+    def compareTracks(self, track1: Track, track2: Track):
+        
+        """
+        Compares two tracks for ordering in the library.
+
+        Parameters:
+            track1 (Track): The first track to compare.
+            track2 (Track): The second track to compare.
+
+        Returns:
+            bool: True if track1 is less than track2, False otherwise.
+        """
+        
+        # The cached key tuple compares field by field in the same order.
+        return track1.getSortKey() < track2.getSortKey()
+
+    def addTrack(self, track: Track):
+        
+        """
+        Adds a track to the library if it doesn't already exist.
+        
+        Parameters:
+            track (Track): The track to add.
+        
+        Returns:
+            bool: True if the track was added, False otherwise.
+        """
+        
+        if self.insertIfAbsent(track):
+            self.indexTrack(track)
+            if self.__storage:
+                self.__storage.addTrack(track)
+            return True
+        return False
+    
+    def removeTrack(self, track: Track):
+        """Removes a track from the library and 
+        updates the playlists that contain it, found through the
+        playlist reverse index, so no other playlist file is opened."""
+        
+        removed = self.deleteIfPresent(track)
+        if removed:
+            self.unindexTrack(removed)
+        
+        if self.__storage and removed:
+            self.__storage.removeTrack(removed)
+        if self.__storage is not None and self.__storage is Playlist.getStorage():
+            # The database holding the playlists too drops the track's entries along with it.
+            return
+        
+        for playlistName in Playlist.getPlaylistsContaining(track):
+            # This library resolves the playlist, whether or not useLibrary was called.
+            playlist = Playlist.loadFromJson(playlistName, library=self)
+            if playlist:
+                playlist.removeTrackByKey(track.getSortKey())
+
+    def getTrackById(self, trackId: str) -> Track:
+        
+        """
+        Looks a track up by its stable ID (see Track.getId), e.g. to resolve
+        the ID lists stored in playlist files. The ID map is built on the
+        first call only, so libraries that never load a playlist skip it.
+        
+        Returns:
+            Track: The track, or None if the library has no track with that ID.
+        """
+        
+        if self.__idIndex is None:
+            self.__idIndex = {track.getId(): track for track in self}
+        return self.__idIndex.get(trackId)
+
+    def getDuplicates(self, title: str) -> list:
+        """searches the library for tracks with 
+        the given title and returns a list of duplicates
+        
+        Same-title tracks are one contiguous run in sorted order, so this is
+        a single seek in O(log n + k) and needs no index."""
+        
+        return list(self.lowerBound(title))
+    
+    def searchTrack(self, title: str, artist: str | None = None) -> Track:
+        
+        """
+        Searches for a specific track in the library.
+        
+        Parameters:
+            title (str): The title of the track to search for.
+            artist (str | None): The artist of the track (optional).
+        
+        Returns:
+            Track: The found track, or None if not found.
+        """
+        
+        return self.findTrack(title, artist)
+
+    def findTrack(self, title: str, artist: str | None = None, album: str | None = None,
+                  duration: str | None = None) -> Track:
+        
+        """
+        Exact lookup on a leading part of the (title, artist, album, duration)
+        key, following the same ordering as compareTracks. It is a single
+        seek to the key, so the cost is O(log n) even when many tracks share
+        a title.
+        
+        Parameters:
+            title (str): The title of the track.
+            artist (str | None): The artist, or None to match any.
+            album (str | None): The album, or None to match any (needs artist).
+            duration (str | None): The duration, or None to match any (needs album).
+        
+        Returns:
+            Track: The first matching track in sorted order, or None if not found.
+        """
+        
+        key = (title, artist, album, duration)
+        length = 1
+        while length < 4 and key[length] is not None:
+            length += 1
+        key = key[:length]
+        
+        for track in self.iterFromKey(key):
+            if track.getSortKey()[:length] == key:
+                return track
+            break
+        return None
+
+    def lowerBound(self, title: str):
+        
+        """
+        Cursor over every track with the given title. Same-title tracks form
+        one contiguous run in sorted order, so this costs O(log n + k).
+        
+        Parameters:
+            title (str): The title to look up.
+        
+        Returns:
+            generator: The matching tracks in sorted order.
+        """
+        
+        for track in self.iterFromKey((title,)):
+            if track.getTitle() != title:
+                return
+            yield track
+    
+    def iterRange(self, low: str, high: str | None = None):
+        
+        """
+        Yields, in sorted order, the tracks whose title is in [low, high).
+        Only the matching slice of the library is visited: O(log n + k).
+        
+        Parameters:
+            low (str): Smallest title to include.
+            high (str | None): Title to stop before, or None for no upper bound.
+        
+        Returns:
+            generator: The tracks in the range.
+        """
+        
+        for track in self.iterFromKey((low,)):
+            if high is not None and track.getTitle() >= high:
+                return
+            yield track
+
+    def iterPrefix(self, prefix: str):
+        
+        """
+        Yields, in sorted order, the tracks whose title starts with prefix,
+        in O(log n + k).
+        
+        Parameters:
+            prefix (str): The start of the title.
+        
+        Returns:
+            generator: The matching tracks.
+        """
+        
+        for track in self.iterFromKey((prefix,)):
+            if not track.getTitle().startswith(prefix):
+                return
+            yield track
+
+    def getTitleSuggestions(self, prefix: str, limit: int = 10) -> list:
+        
+        """
+        Autocompletes a title from its first characters.
+        
+        Parameters:
+            prefix (str): What the user has typed so far.
+            limit (int): The maximum number of distinct titles to return.
+        
+        Returns:
+            list: Distinct matching titles in sorted order.
+        """
+        
+        titles = []
+        for track in self.iterPrefix(prefix):
+            if not titles or titles[-1] != track.getTitle():
+                if len(titles) == limit:
+                    break
+                titles.append(track.getTitle())
+        return titles
+        
+    def searchKeywords(self, query: str, mode: str = "and", limit: int | None = None) -> list:
+        
+        """
+        Keyword search across title, main artist, album and additional
+        artists, answered from the inverted index.
+        
+        Parameters:
+            query (str): The keywords to look for.
+            mode (str): "and" to require every keyword, "or" to accept any.
+            limit (int | None): Maximum number of results, or None for all.
+        
+        Returns:
+            list: Matching tracks ranked by how many keywords they match.
+        """
+        
+        return self.getSearchIndex().search(query, mode, limit)
+
+    def tracksByArtist(self, artist: str, page: int | None = None, pageSize: int = 10) -> list:
+        
+        """
+        Lists the tracks of an artist, including tracks where they are an
+        additional artist, in O(1) plus the size of the result.
+        
+        Parameters:
+            artist (str): The artist's name.
+            page (int | None): The 1-based page to return, or None for every track.
+            pageSize (int): The number of tracks per page.
+        
+        Returns:
+            list: The artist's tracks in library order.
+        """
+        
+        return self.getArtistIndex().getTracks(artist, page, pageSize)
+
+    def tracksByAlbum(self, album: str, page: int | None = None, pageSize: int = 10) -> list:
+        
+        """
+        Lists the tracks of an album, in O(1) plus the size of the result.
+        
+        Parameters:
+            album (str): The album title.
+            page (int | None): The 1-based page to return, or None for every track.
+            pageSize (int): The number of tracks per page.
+        
+        Returns:
+            list: The album's tracks in library order.
+        """
+        
+        return self.getAlbumIndex().getTracks(album, page, pageSize)
+
+    def countByArtist(self, artist: str) -> int:
+        return self.getArtistIndex().getCount(artist)
+
+    def countByAlbum(self, album: str) -> int:
+        return self.getAlbumIndex().getCount(album)
+
+    def getArtists(self, prefix: str = "") -> list:
+        
+        """
+        Returns:
+            list: Every artist name in sorted order, optionally filtered by prefix.
+        """
+        
+        return self.getArtistIndex().getKeys(prefix)
+
+    def getAlbums(self, prefix: str = "") -> list:
+        
+        """
+        Returns:
+            list: Every album title in sorted order, optionally filtered by prefix.
+        """
+        
+        return self.getAlbumIndex().getKeys(prefix)
+
+    def getTotalDuration(self):
+        
+        """
+        Returns the total duration of all tracks in the library.
+        
+        Returns:
+            str: The total duration in "MM:SS" format.
+        """
+        
+        totalSeconds = self.getTotalSeconds()
+        minutes = totalSeconds // 60
+        seconds = totalSeconds % 60
+        return f"{minutes:02}:{seconds:02}"
+
+    def getRangeDuration(self, start: int, end: int) -> int:
+        
+        """
+        Total duration of the tracks at sorted positions start (inclusive) to
+        end (exclusive). This walks the range; backends with subtree
+        aggregates answer it in O(log n) instead.
+        
+        Parameters:
+            start (int): First position of the range.
+            end (int): Position just past the end of the range.
+        
+        Returns:
+            int: The total duration of the range in seconds.
+        """
+        
+        total = 0
+        remaining = end - start
+        for track in self.iterFrom(start):
+            if remaining <= 0:
+                break
+            total += track.getDurationInSeconds()
+            remaining -= 1
+        return total
+
+    def getSortedTracks(self) -> list:
+        
+        """
+        Retrieves all tracks in sorted order.
+        
+        Returns:
+            list: A list of tracks sorted by title, artist, album, and duration.
+        """
+        
+        return list(self)      
+
+    def __iter__(self):
+        return self.iterFrom(0)
+
+    def __len__(self):
+        return self.getSize()
+
+    def buildFromSorted(self, tracks: list):
+        
+        """
+        Replaces the library contents in linear time, building the backend
+        straight from a list of tracks. The list is checked for order first
+        and sorted once if it turns out not to be sorted.
+        
+        Parameters:
+            tracks (list): The tracks to build from, ideally already in the
+            order produced by getSortedTracks.
+        """
+        
+        for index in range(1, len(tracks)):
+            if self.compareTracks(tracks[index], tracks[index - 1]):
+                tracks = sorted(tracks, key=Track.getSortKey)
+                break
+        
+        self.buildStructure(tracks)
+        self.invalidateIndexes()
+
+    def saveToJson(self, filename="Data/tracks.json"):
+        if self.__storage:
+            # Every change was already written when it was made.
+            self.__storage.checkpoint(self)
+            return
+        # Streamed one record at a time; compact if "json_compact" is set.
+        writeArray(filename, (track.toDict() for track in self), indent=2)
+
+    def loadFromJson(self, filename="Data/tracks.json", bulk: bool = True):
+        """Loads tracks from a JSON file and inserts them into the library.
+        handles missing file errors.
+        
+        With bulk enabled (the default) the library is rebuilt in one linear
+        pass from the file, which saveToJson writes in sorted order, instead
+        of adding the records one at a time.
+        
+        The file is parsed one record at a time, so the parsed document is
+        never held in memory next to the tracks built from it.
+        
+        A bulk load into an empty library first tries the cache of the built
+        library kept next to the file, which is only used if the file's size,
+        modification time and hash still match; otherwise the library is
+        rebuilt and the cache refreshed.
+        
+        With a storage engine set, the tracks come from the engine instead."""
+        
+        if self.__storage:
+            self.buildFromSorted(self.__storage.loadTracks())
+            return
+        
+        if not os.path.exists(filename):
+            print(f"File {filename} not found.")
+            return
+        
+        useCache = bulk and not self.getSize() and self.CACHEABLE and getSetting("library_cache")
+        if useCache:
+            cached = readCache(filename, type(self))
+            if cached is not None:
+                self.adopt(cached)
+                return
+        
+        tracks = (Track.fromDict(track_data) for track_data in readArray(filename))
+        if bulk:
+            tracks = list(tracks)
+            self.buildFromSorted(self.getSortedTracks() + tracks if self.getSize() else tracks)
+            if useCache:
+                writeCache(self, filename)
+        else:
+            for track in tracks:
+                self.addTrack(track)
+
+    def __getstate__(self):
+        
+        """
+        Pickles the structure only: the storage engine is not part of the
+        library, and the indexes are rebuilt on first use.
+        """
+        
+        state = self.__dict__.copy()
+        state["_LibraryContainer__storage"] = None
+        state["_LibraryContainer__idIndex"] = None
+        state["_LibraryContainer__searchIndex"] = None
+        state["_LibraryContainer__artistIndex"] = None
+        state["_LibraryContainer__albumIndex"] = None
+        return state
+
+    def adopt(self, other):
+        
+        """
+        Takes over the contents of another library of the same backend, e.g.
+        one loaded from the cache, keeping this library's storage engine. The
+        tracks are registered as the shared instances for later loaders.
+        """
+        
+        storage = self.__storage
+        self.__dict__.update(other.__dict__)
+        self.__storage = storage
+        with pausedGarbageCollector():
+            for track in self:
+                Track.register(track)
+
+    def getPageCount(self, pageSize: int = 10) -> int:
+        
+        """
+        Returns:
+            int: The number of pages needed to list the library.
+        """
+        
+        return (self.getSize() + pageSize - 1) // pageSize
+
+    def getPage(self, page: int, pageSize: int = 10):
+        
+        """
+        Yields only the tracks of one page of the sorted listing. The start
+        of the page is found in O(log n), so no earlier track is visited.
+        
+        Parameters:
+            page (int): The 1-based page number.
+            pageSize (int): The number of tracks per page.
+        
+        Returns:
+            generator: The tracks on that page, in sorted order.
+        """
+        
+        remaining = pageSize
+        for track in self.iterFrom((page - 1) * pageSize):
+            if remaining == 0:
+                return
+            yield track
+            remaining -= 1
+
+    def writeListing(self, stream, page: int | None = None, pageSize: int = 10):
+        
+        """
+        Writes the numbered track listing to a stream line by line instead of
+        building one string.
+        
+        Parameters:
+            stream: Any object with a write method, e.g. sys.stdout or a file.
+            page (int | None): The 1-based page to write, or None for every track.
+            pageSize (int): The number of tracks per page.
+        """
+        
+        stream.write(f"\n<---------All Tracks--------->\n\nTotal Duration: {self.getTotalDuration()}\n\n")
+        if page is None:
+            num = 1
+            tracks = self.iterFrom(0)
+        else:
+            num = (page - 1) * pageSize + 1
+            tracks = self.getPage(page, pageSize)
+        
+        for track in tracks:
+            stream.write(f"{num}. " + track.__str__(True) + "\n")
+            num += 1
+
+    def displayPage(self, page: int = 1, pageSize: int = 10):
+        
+        """
+        Formats one page of the library listing with navigation options.
+        
+        Parameters:
+            page (int): The 1-based page number.
+            pageSize (int): The number of tracks per page.
+        
+        Returns:
+            str: The page text, or False if the page number is invalid.
+        """
+        
+        totalPages = self.getPageCount(pageSize)
+        if page < 1 or page > totalPages:
+            return False
+        
+        display = io.StringIO()
+        self.writeListing(display, page, pageSize)
+        display.write(f"\n<Page {page} of {totalPages}>\n")
+        if page > 1:
+            display.write("[11] Previous Page\n")
+        if page < totalPages:
+            display.write("[12] Next Page\n")
+        return display.getvalue()
+
+    def __str__(self) -> str:
+        s = io.StringIO()
+        self.writeListing(s)
+        return s.getvalue()
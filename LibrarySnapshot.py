@@ -0,0 +1,166 @@
+import array
+import mmap
+import os
+import struct
+import sys
+from TrackClass import Track
+
+MAGIC = b"TRKSNAP1"
+# magic, track count, total seconds
+HEADER = struct.Struct("<8sQQ")
+COLUMNS = ("title", "artist", "album", "duration", "additional_artists")
+# Joins additional artists inside their column.
+SEPARATOR = "\x1f"
+
+class LibrarySnapshot:
+    """
+    Read-only, memory-mapped binary snapshot of a sorted library.
+
+    Layout, all integers little-endian:
+        header          magic, track count, total seconds
+        offset tables   one per column, count + 1 uint64 offsets into the heap;
+                        record i of a column spans offsets[i]..offsets[i + 1]
+        seconds         count uint32 durations in seconds
+        heap            UTF-8 strings, column after column
+
+    Opening only maps the file. Tracks are built on first access, and binary
+    search compares the mapped UTF-8 bytes directly: byte order of UTF-8 is
+    code point order, the same order Python uses for str.
+    """
+
+    def __init__(self, filename: str = "Data/tracks.snap"):
+        """
+        Maps a snapshot file.
+
+        Raises:
+            ValueError: If the file is not a snapshot.
+        """
+        with open(filename, 'rb') as file:
+            self.__map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if len(self.__map) < HEADER.size:
+            raise ValueError(f"{filename} is not a library snapshot")
+        magic, count, totalSeconds = HEADER.unpack_from(self.__map, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{filename} is not a library snapshot")
+
+        self.__count = count
+        self.__totalSeconds = totalSeconds
+        view = memoryview(self.__map)
+        position = HEADER.size
+        self.__offsets = []
+        for _ in COLUMNS:
+            end = position + 8 * (count + 1)
+            self.__offsets.append(self.nativeView(view[position:end], "Q"))
+            position = end
+        self.__seconds = self.nativeView(view[position:position + 4 * count], "I")
+        self.__heap = position + 4 * count
+        self.__tracks = [None] * count
+
+    @staticmethod
+    def nativeView(view: memoryview, code: str):
+        """
+        Returns the little-endian integers of a slice as something indexable:
+        the slice itself on little-endian machines, a swapped copy otherwise.
+        """
+        if sys.byteorder == "little":
+            return view.cast(code)
+        values = array.array(code, view.tobytes())
+        values.byteswap()
+        return values
+
+    @staticmethod
+    def write(tracks: list, filename: str = "Data/tracks.snap"):
+        """
+        Writes tracks, already in library order, as a snapshot. The file is
+        replaced atomically.
+        """
+        heap = bytearray()
+        tables = []
+        for column in range(len(COLUMNS)):
+            offsets = array.array("Q", [len(heap)])
+            for track in tracks:
+                if column == 4:
+                    value = SEPARATOR.join(track.getAdditionalArtists())
+                else:
+                    value = track.getSortKey()[column]
+                heap += value.encode("utf-8")
+                offsets.append(len(heap))
+            tables.append(offsets)
+        seconds = array.array("I", [track.getDurationInSeconds() for track in tracks])
+
+        if sys.byteorder != "little":
+            for values in tables + [seconds]:
+                values.byteswap()
+
+        temporary = filename + ".tmp"
+        with open(temporary, 'wb') as file:
+            file.write(HEADER.pack(MAGIC, len(tracks), sum(track.getDurationInSeconds() for track in tracks)))
+            for offsets in tables:
+                file.write(offsets.tobytes())
+            file.write(seconds.tobytes())
+            file.write(heap)
+        os.replace(temporary, filename)
+
+    def __len__(self):
+        return self.__count
+
+    def getBytes(self, column: int, index: int) -> bytes:
+        """
+        Returns:
+            bytes: The raw UTF-8 value of a column for one record.
+        """
+        offsets = self.__offsets[column]
+        return self.__map[self.__heap + offsets[index]:self.__heap + offsets[index + 1]]
+
+    def getTrack(self, index: int) -> Track:
+        """
+        Returns the track at a position, building it on first access.
+        """
+        track = self.__tracks[index]
+        if track is None:
+            additional = self.getBytes(4, index).decode("utf-8")
+            track = Track.fromDict({
+                "title": self.getBytes(0, index).decode("utf-8"),
+                "artist": self.getBytes(1, index).decode("utf-8"),
+                "album": self.getBytes(2, index).decode("utf-8"),
+                "duration": self.getBytes(3, index).decode("utf-8"),
+                "additional_artists": additional.split(SEPARATOR) if additional else []
+            })
+            self.__tracks[index] = track
+        return track
+
+    def getSeconds(self, index: int) -> int:
+        return self.__seconds[index]
+
+    def getTotalSeconds(self) -> int:
+        return self.__totalSeconds
+
+    def bisectKey(self, key: tuple) -> int:
+        """
+        Finds the first record whose sort key is not less than a (possibly
+        partial) key, comparing on the mapped bytes without building tracks.
+        """
+        encoded = tuple(part.encode("utf-8") for part in key)
+        low, high = 0, self.__count
+        while low < high:
+            mid = (low + high) // 2
+            if tuple(self.getBytes(column, mid) for column in range(len(encoded))) < encoded:
+                low = mid + 1
+            else:
+                high = mid
+        return low
+
+    def iterFrom(self, index: int):
+        index = max(index, 0)
+        while index < self.__count:
+            yield self.getTrack(index)
+            index += 1
+
+    def close(self):
+        """
+        Releases the mapping. Tracks already built stay valid.
+        """
+        self.__offsets = []
+        self.__seconds = None
+        self.__map.close()
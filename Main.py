@@ -1,12 +1,100 @@
+import time
+STARTED = time.perf_counter()
+
 from TrackClass import Track
-from AVLTree import AVLTree
+from LibraryContainer import LibraryContainer
+from LibraryBackends import createLibrary, createStorage, createJournal
 from PlaylistClass import Playlist
 from QueueClass import MusicQueue
+from Config import getSetting
+from WriteBehind import WriteBehind
+import atexit
+
+# How long each startup step took, in seconds, in the order they ran.
+TIMINGS = {"imports": time.perf_counter() - STARTED}
+
+# Subsystems built so far. The library and the queue are only loaded when a
+# menu option first needs them, so e.g. managing playlists never parses
+# tracks.json.
+LOADED = {}
+
+def timed(name: str, loader):
+    """
+    Runs a startup step, records how long it took and, with the
+    "startup_timing" setting on, prints it.
+
+    Returns:
+        Whatever the loader returned.
+    """
+    start = time.perf_counter()
+    value = loader()
+    TIMINGS[name] = time.perf_counter() - start
+    if getSetting("startup_timing"):
+        print(f"[timing] {name}: {TIMINGS[name] * 1000:.1f} ms")
+    return value
+
+def loadStorage():
+    storage = createStorage()
+    Playlist.useStorage(storage)
+    MusicQueue.useStorage(storage)
+    # Playlist files list track IDs; the library is loaded once one is opened.
+    Playlist.useLibrary(getLibrary)
+    return storage
+
+def loadWriter() -> WriteBehind:
+    writer = WriteBehind(getSetting("write_delay"))
+    Playlist.useWriteBehind(writer)
+    MusicQueue.useWriteBehind(writer)
+    # Pending saves are written even if the program ends some other way than "Exit".
+    atexit.register(writer.close)
+    return writer
+
+def loadLibrary() -> LibraryContainer:
+    musicLibrary = createLibrary()
+    musicLibrary.setStorage(LOADED["storage"] or createJournal())
+    musicLibrary.loadFromJson()
+    return musicLibrary
+
+def loadQueue() -> MusicQueue:
+    queue = MusicQueue()
+    queue.loadState()
+    return queue
+
+def getLibrary() -> LibraryContainer:
+    """
+    Returns:
+        LibraryContainer: The music library, loaded on first use.
+    """
+    if "library" not in LOADED:
+        LOADED["library"] = timed("library", loadLibrary)
+    return LOADED["library"]
+
+def getQueue() -> MusicQueue:
+    """
+    Returns:
+        MusicQueue: The queue with its saved state, loaded on first use.
+    """
+    if "queue" not in LOADED:
+        LOADED["queue"] = timed("queue", loadQueue)
+    return LOADED["queue"]
+
+# Playlists, the queue and the library all read from the storage engine, so
+# it is set up before anything else. Opening it is cheap.
+LOADED["storage"] = timed("storage", loadStorage)
+# Saves are deferred and coalesced by a background writer (see WriteBehind).
+LOADED["writer"] = timed("writer", loadWriter)
 
-musicLibrary = AVLTree()
-musicLibrary.loadFromJson()
-queue = MusicQueue()
-queue.loadState()
+def readInput(prompt: str = "") -> str:
+    """
+    input() during which the background writer may save pending changes.
+    """
+    return LOADED["writer"].idleInput(prompt)
+
+def markLibraryDirty():
+    """
+    Schedules saving the library; repeated edits are written once.
+    """
+    LOADED["writer"].markDirty("library", getLibrary().saveToJson)
 
 MENUS = {
     "musicLibrary": {
@@ -58,12 +146,12 @@ def should_quit(var: str) -> bool:
     """
     return var == "q" or var == "Q"
 
-def addTrackToPlaylist(musicLibrary: AVLTree, playlistName: str) -> None:
+def addTrackToPlaylist(musicLibrary: LibraryContainer, playlistName: str) -> None:
     """
     Adds a track to the specified playlist.
 
     Parameters:
-        musicLibrary (AVLTree): The music library containing tracks.
+        musicLibrary (LibraryContainer): The music library containing tracks.
         playlistName (str): The name of the playlist to which the track will be added.
     """
     playlist_obj = Playlist.loadFromJson(playlistName)
@@ -72,25 +160,25 @@ def addTrackToPlaylist(musicLibrary: AVLTree, playlistName: str) -> None:
         return
 
     while True:
-        title = input("Enter title of the track ('q' to cancel): ")
+        title = readInput("Enter title of the track ('q' to cancel): ")
         if should_quit(title):
             break
 
-        duplicates = musicLibrary.getDuplicates(musicLibrary.getRoot(), title)
+        duplicates = musicLibrary.getDuplicates(title)
         found = musicLibrary.searchTrack(title)
 
         if len(duplicates) > 1:
             showDuplicates(duplicates)
-            artist_name = input("\nSpecify track artist ('q' to cancel): ")
+            artist_name = readInput("\nSpecify track artist ('q' to cancel): ")
             if should_quit(artist_name):
                 print(f"No track added to the playlist {playlistName}.")
                 break
 
             track = musicLibrary.searchTrack(title, artist_name)
             if track:
-                if track not in playlist_obj.getTracks():
+                if not playlist_obj.hasTrack(track):
                     playlist_obj.addTrack(track)
-                    playlist_obj.saveToJson()
+                    playlist_obj.markDirty()
                     print(f"Track '{track.getTitle()}' by {track.getArtist()} added successfully to the playlist.")
                 else:
                     print(f"Track '{track.getTitle()}' is already in the playlist {playlistName}.")
@@ -98,16 +186,14 @@ def addTrackToPlaylist(musicLibrary: AVLTree, playlistName: str) -> None:
                 print("Track not found. Please try again.")
 
         elif found:
-            if found not in playlist_obj.getTracks():
+            if not playlist_obj.hasTrack(found):
                 playlist_obj.addTrack(found)
-                playlist_obj.saveToJson()
+                playlist_obj.markDirty()
                 print(f"{found.getTitle()} by {found.getArtist()} added successfully to the playlist.")
             else:
                 print(f"Track '{found.getTitle()}' is already in the playlist {playlistName}.")
         else:
             print("Track not found. Please try again.")
-        
-        playlist_obj.saveToJson()
 
 def showDuplicates(track_list: list) -> None:
     """
@@ -279,7 +365,7 @@ def addTrack() -> Track | None | bool:
     while True:
         print("\n<---------Add Track--------->")
         print("Instruction | 'q' to cancel adding a track")
-        title = input("Enter Title: ")
+        title = readInput("Enter Title: ")
         if should_quit(title):
             print("Track addition canceled.\n")
             return None
@@ -287,7 +373,7 @@ def addTrack() -> Track | None | bool:
             print("Title cannot be empty. Please enter a valid title.")
             continue
 
-        artist = input("Enter Artist: ")
+        artist = readInput("Enter Artist: ")
         if should_quit(artist):
             print("Track addition canceled.\n")
             return None
@@ -297,13 +383,13 @@ def addTrack() -> Track | None | bool:
 
         additionalArtists = []
         while True:
-            collaborators = input("Add Additional Artist(s)? (y/n): ")
+            collaborators = readInput("Add Additional Artist(s)? (y/n): ")
             if should_quit(collaborators):
                 print("Track addition canceled.\n")
                 return None
             elif collaborators == "y" or collaborators == "Y":
                 while True:
-                    additional = input("Enter other Artist(s) ('q' to stop): ")
+                    additional = readInput("Enter other Artist(s) ('q' to stop): ")
 
                     if should_quit(additional):
                         break
@@ -322,7 +408,7 @@ def addTrack() -> Track | None | bool:
             else:
                 print("Invalid input. Please enter 'y' or 'n'.")
 
-        album = input("Enter Album Title: ")
+        album = readInput("Enter Album Title: ")
         if should_quit(album):
             print("Track addition canceled.\n")
             return None
@@ -331,7 +417,7 @@ def addTrack() -> Track | None | bool:
             print("Album cannot be empty. Please enter valid album.")
 
         while True:
-            duration = input("Enter Duration (e.g., 1:42): ")
+            duration = readInput("Enter Duration (e.g., 1:42): ")
             if should_quit(duration):
                 return None
 
@@ -343,7 +429,7 @@ def addTrack() -> Track | None | bool:
                 print("Invalid duration. Please enter in 'mm:ss' format.")
 
         track = Track(spaceCleaner(title), spaceCleaner(artist), spaceCleaner(album), formattedDuration, additionalArtists)
-        return (track if musicLibrary.searchTrack(track.getTitle(), track.getArtist()) == None else False)
+        return (track if getLibrary().searchTrack(track.getTitle(), track.getArtist()) == None else False)
 
 def playPlaylist(playlistName: str, queue: MusicQueue):
     """
@@ -361,11 +447,10 @@ def playPlaylist(playlistName: str, queue: MusicQueue):
     if queue.isQueueEmpty():
         for track in playlist.getTracks():
             queue.addTrack(track)
-        queue.saveState(source="Playlist", playlist_name=playlistName)
 
     queue.play()
     queue.queueInterface()
-    queue.saveState(source="Playlist", playlist_name=playlistName)
+    queue.markDirty()
 
 def main():
     """
@@ -376,50 +461,59 @@ def main():
         Persistent data storage in JSON format
 
     """
+    # The main thread owns the data and only lets the writer in while it
+    # waits for input.
+    LOADED["writer"].getLock().acquire()
     while True:
         print("\n<==========Listen to Music==========>")
         showMenu("musicLibrary")
-        opt = input("\nEnter choice: ")
+        if "first menu" not in TIMINGS:
+            TIMINGS["first menu"] = time.perf_counter() - STARTED
+            if getSetting("startup_timing"):
+                print(f"[timing] time to first menu: {TIMINGS['first menu'] * 1000:.1f} ms "
+                      f"(imports {TIMINGS['imports'] * 1000:.1f} ms)")
+        opt = readInput("\nEnter choice: ")
 
         match opt:
             case "0":
             # Exit Program
-                musicLibrary.saveToJson()
+                LOADED["writer"].close()  # writes whatever is still pending
                 print("Exiting program. Goodbye!")
                 break
             
             case "1":
+                musicLibrary = getLibrary()
+                queue = getQueue()
                 queue.checkAndLoadState(source="Library")
                 if queue.isQueueEmpty():
                     for track in musicLibrary.getSortedTracks():
                         queue.addTrack(track)
-                        queue.saveState()
 
                 queue.play()
                 queue.queueInterface()
-                queue.saveState()
+                queue.markDirty()
 
             case "2":
                 while True:
                     print("\n<---------Playlists--------->")
                     showMenu("playlists")
-                    opt = input("\nEnter choice: ")
+                    opt = readInput("\nEnter choice: ")
 
                     if opt == "0":
                         break
 
                     elif opt == "1":
-                        playlistName = input("Enter the playlist name to play ('q' to cancel): ")
+                        playlistName = readInput("Enter the playlist name to play ('q' to cancel): ")
                         if should_quit(playlistName):
                             continue
-                        playPlaylist(playlistName, queue)
+                        playPlaylist(playlistName, getQueue())
 
                     elif opt == "2":
-                        playlistName = input("Enter new playlist name ('q' to cancel): ")
+                        playlistName = readInput("Enter new playlist name ('q' to cancel): ")
                         if should_quit(playlistName):
                             continue
 
-                        if playlistName in Playlist.getPlaylistName():
+                        if Playlist.hasPlaylist(playlistName):
                             print(f"Playlist '{playlistName}' already exists.")
                         else:
                             new_playlist = Playlist(spaceCleaner(playlistName))
@@ -435,7 +529,7 @@ def main():
                             current_page = 1
                             while True:
                                 print(Playlist.displayPlaylists(playlist_names, current_page))
-                                user_input = input("Enter option ('0' to Exit): ")
+                                user_input = readInput("Enter option ('0' to Exit): ")
                                 if user_input == "0":
                                     break
                                 elif user_input == "11":
@@ -449,34 +543,34 @@ def main():
 
                     elif opt == "4":
                         while True:
-                            playlistName = input("Enter playlist name ('q' to cancel): ")
+                            playlistName = readInput("Enter playlist name ('q' to cancel): ")
                             if should_quit(playlistName):
                                 break
 
-                            if playlistName not in Playlist.getPlaylistName():
+                            if not Playlist.hasPlaylist(playlistName):
                                 print(f'Playlist "{playlistName}" not found.')
                                 continue
                             else:
-                                addTrackToPlaylist(musicLibrary, playlistName)
+                                addTrackToPlaylist(getLibrary(), playlistName)
                                 break
                             
                     elif opt == "5":
-                        playlistName = input("Enter playlist name to delete ('q' to cancel): ")
+                        playlistName = readInput("Enter playlist name to delete ('q' to cancel): ")
                         if should_quit(playlistName):
                             continue
 
-                        if playlistName in Playlist.getPlaylistName():
+                        if Playlist.hasPlaylist(playlistName):
                             Playlist(playlistName).deletePlaylist()
                             print(f"Playlist '{playlistName}' deleted successfully.")
                         else:
                             print(f"Playlist '{playlistName}' not found.")
 
                     elif opt == "6":
-                        playlistName = input("Enter playlist name to display ('q' to cancel): ")
+                        playlistName = readInput("Enter playlist name to display ('q' to cancel): ")
                         if should_quit(playlistName):
                             continue
 
-                        if playlistName in Playlist.getPlaylistName():
+                        if Playlist.hasPlaylist(playlistName):
                             print(Playlist.loadFromJson(playlistName))
 
                         else:
@@ -484,17 +578,17 @@ def main():
 
                     elif opt == "7":
                         while True:
-                            playlistName = input("Enter playlist name ('q' to cancel): ")
+                            playlistName = readInput("Enter playlist name ('q' to cancel): ")
                             if should_quit(playlistName):
                                 break
 
-                            if playlistName not in Playlist.getPlaylistName():
+                            if not Playlist.hasPlaylist(playlistName):
                                 print(f"Playlist '{playlistName}' not found. Please check the name and try again.")
                                 continue
 
                             playlist = Playlist.loadFromJson(playlistName)
                             if playlist:
-                                track_title = input("Enter title of the track: ")
+                                track_title = readInput("Enter title of the track: ")
                                 
                                 deleted = playlist.removeTrack(track_title)
                                 if deleted != None:
@@ -506,6 +600,7 @@ def main():
                             
             case "3":
                 # Adds new track
+                musicLibrary = getLibrary()
                 while True:
                     new_track = addTrack()
                     if new_track is None:
@@ -513,28 +608,44 @@ def main():
                     elif new_track:
                         # Add track to library
                         musicLibrary.addTrack(new_track)
+                        markLibraryDirty()
                         print("Track added successfully...\n")
-                        if input("Add another track? (y/n): ") == "n" or input("Add another track (y/): ") == "N":
+                        if readInput("Add another track? (y/n): ") == "n" or readInput("Add another track (y/): ") == "N":
                             break
 
                     else:
                         print("Track already exists...")
-                
-                # Save updated library
-                musicLibrary.saveToJson()
 
             case "4":
-                # Display all tracks in the music library.
-                print(musicLibrary)
+                # Display all tracks in the music library, one page at a time.
+                musicLibrary = getLibrary()
+                if musicLibrary.getSize() == 0:
+                    print(musicLibrary)
+                else:
+                    current_page = 1
+                    while True:
+                        print(musicLibrary.displayPage(current_page))
+                        user_input = readInput("Enter option ('0' to Exit): ")
+                        if user_input == "0":
+                            break
+                        elif user_input == "11":
+                            if current_page > 1:
+                                current_page -= 1
+                        elif user_input == "12":
+                            if current_page < musicLibrary.getPageCount():
+                                current_page += 1
+                        else:
+                            print("Invalid input. Please try again.")
             
             case "5":
                 # Search for a track
                 print("\n>>> Search for a Track <<<")
-                title = input("Enter title of the track ('q' to cancel): ")
+                title = readInput("Enter title of the track ('q' to cancel): ")
                 if should_quit(title):
                     continue   
 
-                duplicates = musicLibrary.getDuplicates(musicLibrary.getRoot(), title)
+                musicLibrary = getLibrary()
+                duplicates = musicLibrary.getDuplicates(title)
                 found = musicLibrary.searchTrack(title)
 
                 if len(duplicates) > 1:
@@ -544,24 +655,38 @@ def main():
                     print(found)
                 else:
                     print("Track not found.\n")
+                    # Fall back to keyword search over titles, artists and albums.
+                    matches = musicLibrary.searchKeywords(title, limit=10)
+                    if not matches:
+                        matches = musicLibrary.searchKeywords(title, "or", limit=10)
+                    if matches:
+                        print("Keyword matches:")
+                        for match in matches:
+                            print("\t" + match.__str__(True))
+
+                    suggestions = musicLibrary.getTitleSuggestions(title)
+                    if suggestions:
+                        print("Titles starting with '{}':".format(title))
+                        for suggestion in suggestions:
+                            print("\t" + suggestion)
 
             case "6":       # Prompt user to enter the title of the track to delete
                 print("\n>>> Delete a Track <<<")
-                title = input("Enter title of the track ('q' to cancel): ")
+                title = readInput("Enter title of the track ('q' to cancel): ")
                 if should_quit(title):   # Check if the user wants to cancel the operation
                     print("Deletion Cancelled...\n")
                     continue   # Exit the current loop and return to the main menu
 
                 
                 # Retrieve duplicates of the track in the music library
-                
-                duplicates = musicLibrary.getDuplicates(musicLibrary.getRoot(), title)
+                musicLibrary = getLibrary()
+                duplicates = musicLibrary.getDuplicates(title)
                 found = musicLibrary.searchTrack(title)
 
                 # If there are multiple duplicates, ask for the artist's name to identify the correct track
                 if len(duplicates) > 1:
                     showDuplicates(duplicates)
-                    artist_name = input("Specify track artist ('q' to cancel): ")
+                    artist_name = readInput("Specify track artist ('q' to cancel): ")
                     if should_quit(artist_name):   # If the user cancels, move to the next loop
                         continue
 
@@ -570,23 +695,23 @@ def main():
                     if track:
                         print(f"Track {track.getTitle()} by {track.getArtist()} deleted.\n")
                         musicLibrary.removeTrack(track) # Delete the track from the library
+                        markLibraryDirty()
                     else:
                         print("Artist not found.") 
                 elif found:                       # If there's no duplication, simply delete the track found by title
                     musicLibrary.removeTrack(found)
+                    markLibraryDirty()
                     print("Track deleted.\n")
                 else:                             # If no track is found with the specified artist
                     print("Track not found.\n") 
-
-                musicLibrary.saveToJson() # Save the updated library to a JSON file
                 
             case "7":                     # Prompt the user to enter the playlist name where they want to add a track
-                playlistName = input("\nEnter playlist name ('q' to cancel): ")
+                playlistName = readInput("\nEnter playlist name ('q' to cancel): ")
                 if should_quit(playlistName):
                     continue
 
                 # Add the track to the specified playlist
-                addTrackToPlaylist(musicLibrary, playlistName)
+                addTrackToPlaylist(getLibrary(), playlistName)
             
             case _:
                 print("Invalid Option.")
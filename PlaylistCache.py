@@ -0,0 +1,75 @@
+from collections import OrderedDict
+from Config import getSetting
+
+class PlaylistCache:
+    def __init__(self, capacity: int | None = None):
+        """
+        Least-recently-used cache of loaded Playlist objects, so opening the
+        same playlist again does not re-parse its file. The size limit counts
+        tracks rather than playlists, so a few huge playlists cannot pin an
+        unbounded amount of memory.
+
+        Each entry remembers the modification time of the file it was read
+        from or saved to; a file changed by anything else is read again.
+
+        Parameters:
+            capacity (int | None): The maximum number of tracks held, or None
+            for the "playlist_cache_tracks" setting.
+        """
+        self.__capacity = capacity
+        self.__entries = OrderedDict()  # name -> (playlist, mtime, size), least recently used first
+        self.__tracks = 0
+
+    def getCapacity(self) -> int:
+        if self.__capacity is None:
+            self.__capacity = getSetting("playlist_cache_tracks")
+        return self.__capacity
+
+    def getTrackCount(self) -> int:
+        return self.__tracks
+
+    def get(self, name: str, mtime: float):
+        """
+        Returns:
+            Playlist | None: The cached playlist if its file still has the
+            given modification time, otherwise None.
+        """
+        entry = self.__entries.get(name)
+        if entry is None:
+            return None
+        if entry[1] != mtime:
+            # Changed on disk since it was cached.
+            self.drop(name)
+            return None
+        self.__entries.move_to_end(name)
+        return entry[0]
+
+    def put(self, name: str, playlist, mtime: float):
+        """
+        Caches a playlist as it is in its file with the given modification
+        time, evicting the least recently used playlists until the tracks
+        fit. A playlist larger than the whole cache is not kept.
+        """
+        self.drop(name)
+        # Empty playlists count as one, so they are bounded too.
+        size = max(playlist.getTrackCount(), 1)
+        capacity = self.getCapacity()
+        if size > capacity:
+            return
+        self.__entries[name] = (playlist, mtime, size)
+        self.__tracks += size
+        while self.__tracks > capacity:
+            _, (_, _, evicted) = self.__entries.popitem(last=False)
+            self.__tracks -= evicted
+
+    def drop(self, name: str):
+        """
+        Forgets a playlist, e.g. one that was deleted.
+        """
+        entry = self.__entries.pop(name, None)
+        if entry is not None:
+            self.__tracks -= entry[2]
+
+    def clear(self):
+        self.__entries.clear()
+        self.__tracks = 0
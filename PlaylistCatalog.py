@@ -0,0 +1,140 @@
+import json
+import os
+import time
+from TrackClass import Track
+from JsonStream import readObject
+
+class PlaylistCatalog:
+    def __init__(self, directory: str = "Data/Playlists", interval: float = 1.0):
+        """
+        In-memory catalog of the playlist files: name, track count, total
+        seconds and file modification time of each playlist. Listing,
+        existence checks and the playlist pager are answered from memory.
+
+        The directory is only re-listed when its own modification time
+        changed, i.e. a playlist file was created, deleted or replaced, and
+        then only files whose modification time changed are read again.
+        That check itself runs at most once per `interval` seconds, so the
+        many lookups of one menu action never touch the disk. Playlist keeps
+        the entries current when it saves or deletes.
+
+        Parameters:
+            directory (str): Where the playlist JSON files live.
+            interval (float): Minimum seconds between two directory checks.
+        """
+        self.__directory = directory
+        self.__interval = interval
+        self.__entries = {}  # playlist name -> {"count": int, "seconds": int, "mtime": float}
+        self.__directoryMtime = None
+        self.__exists = False
+        self.__checked = None  # time.monotonic() of the last directory check
+
+    @staticmethod
+    def readEntry(filename: str, mtime: float) -> dict:
+        """
+        Reads the count and total seconds of a playlist file without building
+        its tracks. Files without "total_seconds" (the older format that
+        embeds whole tracks) are summed from their durations.
+        """
+        count = 0
+        seconds = None
+        embedded = 0
+        for key, value in readObject(filename, ("tracks",)):
+            if key == "total_seconds":
+                seconds = value
+            elif key == "tracks":
+                for element in value:
+                    count += 1
+                    if isinstance(element, dict):
+                        embedded += Track.parseDuration(element["duration"])
+        return {"count": count, "seconds": embedded if seconds is None else seconds, "mtime": mtime}
+
+    def refresh(self) -> bool:
+        """
+        Brings the catalog up to date with the directory, if the directory
+        changed since it was last checked and that was over `interval`
+        seconds ago.
+
+        Returns:
+            bool: False if the directory does not exist.
+        """
+        now = time.monotonic()
+        if self.__checked is not None and now - self.__checked < self.__interval:
+            return self.__exists
+        self.__checked = now
+
+        try:
+            mtime = os.stat(self.__directory).st_mtime_ns
+        except FileNotFoundError:
+            self.__entries = {}
+            self.__directoryMtime = None
+            self.__exists = False
+            return False
+        self.__exists = True
+        if mtime == self.__directoryMtime:
+            return True
+        self.__directoryMtime = mtime
+
+        current = {}
+        for file in os.listdir(self.__directory):
+            if len(file) > 5 and file[-5:] == ".json":
+                current[file[:-5]] = os.path.getmtime(os.path.join(self.__directory, file))
+
+        for name in list(self.__entries):
+            if name not in current:
+                del self.__entries[name]
+
+        for name, fileMtime in current.items():
+            entry = self.__entries.get(name)
+            if entry is None or entry["mtime"] != fileMtime:
+                try:
+                    self.__entries[name] = self.readEntry(os.path.join(self.__directory, name + ".json"), fileMtime)
+                except (FileNotFoundError, json.JSONDecodeError, KeyError):
+                    self.__entries[name] = {"count": 0, "seconds": 0, "mtime": fileMtime}
+        return True
+
+    def setPlaylist(self, name: str, count: int, seconds: int, mtime: float | None = None):
+        """
+        Records the current contents of a playlist.
+
+        Parameters:
+            name (str): The playlist name.
+            count (int): The number of tracks.
+            seconds (int): The total duration in seconds.
+            mtime (float | None): The modification time of its file after
+            saving, or None while the save is still pending.
+        """
+        entry = self.__entries.get(name)
+        if mtime is None:
+            mtime = entry["mtime"] if entry else None
+        self.__entries[name] = {"count": count, "seconds": seconds, "mtime": mtime}
+
+    def dropPlaylist(self, name: str):
+        """
+        Records that a playlist was deleted.
+        """
+        self.__entries.pop(name, None)
+
+    def getNames(self) -> list:
+        """
+        Returns:
+            list: The playlist names in sorted order.
+        """
+        self.refresh()
+        return sorted(self.__entries)
+
+    def getEntry(self, name: str) -> dict:
+        """
+        Returns:
+            dict | None: The "count", "seconds" and "mtime" of a playlist, or
+            None if there is no such playlist.
+        """
+        self.refresh()
+        return self.__entries.get(name)
+
+    def exists(self) -> bool:
+        """
+        Returns:
+            bool: True if the playlist directory exists.
+        """
+        return self.refresh()
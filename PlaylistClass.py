@@ -1,21 +1,64 @@
-import json
 from TrackClass import Track
+from JsonStream import readObject, writeObject
+from PlaylistIndex import PlaylistIndex
+from PlaylistCatalog import PlaylistCatalog
+from PlaylistCache import PlaylistCache
 import os
 
 class Playlist:
+    # Which playlists contain which tracks, shared by every Playlist.
+    __index = PlaylistIndex()
+    # Name, track count and duration of every playlist file, kept in memory.
+    __catalog = PlaylistCatalog()
+    # Recently loaded playlists, so opening one again does not re-parse its file.
+    __cache = PlaylistCache()
+    # Storage engine holding the playlists instead of Data/Playlists, if any.
+    __storage = None
+    # Write-behind writer that coalesces playlist saves, if any.
+    __writer = None
+    # Returns the library that the track IDs in playlist files are resolved against.
+    __library = None
+
     def __init__(self, name):
         self.__name = name
-        self.__tracks = []
-        self.__total_duration = "00:00"
+        # Sort key -> track, in playlist order. The dict is both the ordered
+        # track list and the membership index, so add, contains and remove are O(1).
+        self.__tracks = {}
+        # Title -> {sort key: None}, in playlist order, for removing by title.
+        self.__titles = {}
+        # Kept up to date by every add and remove; formatted only when asked for.
+        self.__total_seconds = 0
 
     def getName(self):
         return self.__name
 
     def getTotalDuration(self):
-        return self.__total_duration
+        """
+        Returns:
+            str: The total duration of the playlist in "MM:SS" format.
+        """
+        totalSeconds = self.__total_seconds
+        return f"{totalSeconds // 60:02}:{totalSeconds % 60:02}"
+
+    def getTotalSeconds(self) -> int:
+        return self.__total_seconds
 
     def getTracks(self):
-        return self.__tracks
+        """
+        Returns:
+            list: The tracks in playlist order.
+        """
+        return list(self.__tracks.values())
+
+    def getTrackCount(self) -> int:
+        return len(self.__tracks)
+
+    def hasTrack(self, track: Track) -> bool:
+        """
+        Checks in O(1) whether the playlist contains a track with the same
+        title, artist, album and duration.
+        """
+        return track.getSortKey() in self.__tracks
 
     def countSameTitles(self, track: Track):
         """
@@ -24,13 +67,22 @@ class Playlist:
         Returns: Bool
         True if a track with the same title exists more than once, else False.
         """
-        count = 0
-        for i in self.__tracks:
-            # Iterate through all the tracks and compare title for each track.
-            if i.getTitle() == track.getTitle():
-                # If titles match, increment the counter and return True if title appears more than once.
-                count += 1
-        return count > 1
+        return len(self.__titles.get(track.getTitle(), ())) > 1
+
+    def insertTrack(self, track: Track) -> bool:
+        """
+        Appends a track to the playlist and adds its seconds to the total.
+
+        Returns:
+            bool: False if the playlist already contains the track.
+        """
+        key = track.getSortKey()
+        if key in self.__tracks:
+            return False
+        self.__tracks[key] = track
+        self.__titles.setdefault(key[0], {})[key] = None
+        self.__total_seconds += track.getDurationInSeconds()
+        return True
 
     def addTrack(self, track):
         """
@@ -39,68 +91,65 @@ class Playlist:
         Returns:
         False (Boolean) if the track already exists else it returns the added track.
         """
-        if track not in self.__tracks:
-            self.__tracks += [track]
-            self.updateTotalDuration()
+        if self.insertTrack(track):
+            if Playlist.__storage:
+                Playlist.__storage.appendPlaylistTrack(self.__name, track)
             return track
         return False
     
-    def removeTrack(self, title: str):
-        """
-        Removes a track from the playlist by its title through divide-and-conquer approach.
-
-        Title of the track (string) as the parameter.
-        """
-        def divideAndConquer(tracks):
-            """
-            Helper method to recursively search for the track to remove.
-
-            Parameter: Tracks -> list of tracks to search through
-
-            Returns: Tuple
-            A list of remaining tracks and the removed track (if there is).
-            """
-            if not tracks:
-                # If the list is empty, it returns and empty list and None
-                return [], None
-            
-            # If there is only one track in the list:
-            if len(tracks) == 1: 
-                track = tracks[0]
-                # Checks if the title matched with the given title
-                if track.getTitle() == title:
-                    # If titles match, track will be remove else track is keep and returns None.
-                    return [], track
-                else:
-                    return [track], None
-            
-            # Dividing the list into two halves.
-            mid = len(tracks) // 2
-            # Recursive search in the left half
-            left, removed_left = divideAndConquer(tracks[:mid])
-            # Recursive search in the right half
-            right, removed_right = divideAndConquer(tracks[mid:])
-
-            # Checks which half contains the removed track
-            removed_track = removed_left or  removed_right
-            # Combines remaining tracks and returns the removed track
-            return left + right, removed_track
-        
-        # Divide and conquer approach to find and remove the track.
-        new_tracks, removed_track = divideAndConquer(self.__tracks)
+    def removeTrack(self, title: str, artist: str | None = None):
+        """
+        Removes the tracks with a title from the playlist, found through the
+        title index instead of scanning the playlist.
+
+        Title of the track (string) as the parameter, and optionally the artist (string)
+        to pick the right track when several share the title.
 
+        Returns:
+        The first removed track in playlist order, or None if no track matched.
         """
-        If track is removed:
-            Update the playlist with the remaining tracks;
-            Update the total duration of the playlist;
-            Save the updated playlist to a JSON file; and
-            Return the removed track.
+        keys = [key for key in self.__titles.get(title, ()) if artist is None or key[1] == artist]
+        removed = [self.detachTrack(key) for key in keys]
+        if removed:
+            self.recordRemoval(removed)
+        return removed[0] if removed else None
+
+    def removeTrackByKey(self, key: tuple):
         """
-        if removed_track:
-            self.__tracks = new_tracks
-            self.updateTotalDuration()
-            self.saveToJson()
-        return removed_track
+        Removes exactly the track with a sort key in O(1).
+
+        Returns:
+            Track | None: The removed track, or None if the playlist does not contain it.
+        """
+        if key not in self.__tracks:
+            return None
+        removed = self.detachTrack(key)
+        self.recordRemoval([removed])
+        return removed
+
+    def detachTrack(self, key: tuple) -> Track:
+        """
+        Drops a track that is in the playlist from both indexes and takes
+        its seconds off the total.
+        """
+        keys = self.__titles[key[0]]
+        del keys[key]
+        if not keys:
+            del self.__titles[key[0]]
+        track = self.__tracks.pop(key)
+        self.__total_seconds -= track.getDurationInSeconds()
+        return track
+
+    def recordRemoval(self, removed: list):
+        """
+        Saves removed tracks: the storage engine deletes just their rows,
+        the JSON file is rewritten (deferred, see markDirty).
+        """
+        if Playlist.__storage:
+            for track in removed:
+                Playlist.__storage.removePlaylistTrack(self.__name, track)
+        else:
+            self.markDirty()
     
     def deletePlaylist(self):
         """
@@ -109,57 +158,144 @@ class Playlist:
         Returns: Bool
         True if file is successfully deleted, else False.
         """
+        if Playlist.__writer:
+            # A deferred save would bring the playlist back.
+            Playlist.__writer.discard("playlist:" + self.getName())
+        Playlist.__cache.drop(self.getName())
+
+        if Playlist.__storage:
+            return Playlist.__storage.deletePlaylist(self.getName())
 
         # Constructing file path
         filename = f"Data/Playlists/{self.getName()}.json"
         # Check if the file exists, if it does then it will be deleted.
         if os.path.exists(filename):
             os.remove(filename)
+            Playlist.__index.dropPlaylist(self.getName())
+            Playlist.__catalog.dropPlaylist(self.getName())
             return True
         
         return False
     
     def updateTotalDuration(self):
         """
-        Updates total duration of the playlist by summing the duration of all tracks.
+        Recomputes the total duration of the playlist by summing the duration of all tracks.
 
-        Duration of each track is retrived in seconds, and the total is converted to  
-        "MM:SS" format.
+        Adding and removing tracks keeps the total current on their own; this
+        full pass is only needed to repair it.
         """
         total_sec = 0
         # Iterate through all tracks in the playlist and add the duration of each track (in seconds).
-        for track in self.getTracks():
+        for track in self.__tracks.values():
             total_sec += track.getDurationInSeconds()
-        # Converts total seconds to "MM:SS" format
-        self.__total_duration = f"{total_sec // 60:02}:{total_sec % 60:02}"
+        self.__total_seconds = total_sec
  
     def saveToJson(self):
         """
         Saves the playlist data to a JSON file.
 
         The file is stored in 'Data/Playlists/' directory with the playlist name as the filename.
+        It lists the tracks by ID (see Track.getId) instead of copying them.
+        With a storage engine set, the playlist is stored there instead.
         """
+        if Playlist.__storage:
+            Playlist.__storage.savePlaylist(self.__name, self.getTracks())
+            return
+
         filename = f"Data/Playlists/{self.getName()}.json"
-        with open(filename, 'w') as file:
-            json.dump({
-                "name": self.__name,
-                "total_duration":self.__total_duration,
-                "tracks":[track.toDict() for track in self.getTracks()]
-                }, file, indent=2)
+        # Hashed once here for both the file and the reverse index.
+        trackIds = [track.getId() for track in self.__tracks.values()]
+        writeObject(filename, {
+            "name": self.__name,
+            "total_seconds": self.__total_seconds,
+            "tracks": trackIds
+            }, indent=2, streamKeys=("tracks",))
+        mtime = os.path.getmtime(filename)
+        Playlist.__index.setPlaylist(self.__name, trackIds, mtime)
+        Playlist.__catalog.setPlaylist(self.__name, len(self.__tracks), self.__total_seconds, mtime)
+        # Write-through: the cached playlist is the one just written.
+        Playlist.__cache.put(self.__name, self, mtime)
+
+    def markDirty(self):
+        """
+        Records that the playlist changed. With a write-behind writer the
+        save is deferred and coalesced; otherwise it is saved right away.
+        A storage engine already has every added and removed row.
+        """
+        if Playlist.__storage:
+            return
+        if Playlist.__writer:
+            Playlist.__writer.markDirty("playlist:" + self.__name, self.saveToJson)
+            # The catalog shows the change before the file is written.
+            Playlist.__catalog.setPlaylist(self.__name, len(self.__tracks), self.__total_seconds)
+        else:
+            self.saveToJson()
 
     @staticmethod
    # This decorator indicates that the method is a static method,
-    def loadFromJson(playlistname: str): # Defines the method 'loadFromJson' which takes the name of the playlist as a string parameter.
+    def loadFromJson(playlistname: str, library=None): # Defines the method 'loadFromJson' which takes the name of the playlist as a string parameter.
+        """
+        Loads a playlist. A playlist loaded or saved before is returned from
+        the cache, as the same object, unless its file changed since.
+
+        Parameters:
+            playlistname (str): The playlist name.
+            library (LibraryContainer | None): Where the stored track IDs are
+            looked up; None uses the library set with useLibrary.
+        """
+        if Playlist.__writer:
+            # Write a deferred save first, so the playlist read is the latest.
+            Playlist.__writer.flush("playlist:" + playlistname)
+        if Playlist.__storage:
+            tracks = Playlist.__storage.loadPlaylistTracks(playlistname)
+            if tracks is None:
+                return None
+            playlist = Playlist(playlistname)
+            for track in tracks:
+                playlist.insertTrack(track)
+            return playlist
+
         filename = f"Data/Playlists/{playlistname}.json"
         try:
-            with open (filename, 'r') as file:
-                data = json.load(file)  # Parses the JSON file contents and loads them into a Python dictionary.
-                playlist = Playlist(data["name"]) 
-                playlist.__total_duration = data["total_duration"]
-                for track_data in data["tracks"]: # Iterates over each track's data in the 'tracks' field of the loaded JSON data
-                    track = Track.fromDict(track_data)
-                    playlist.addTrack(track)
-                return playlist
+            mtime = os.path.getmtime(filename)
+        except FileNotFoundError:
+            Playlist.__cache.drop(playlistname)
+            return None
+        cached = Playlist.__cache.get(playlistname, mtime)
+        if cached is not None:
+            return cached
+
+        try:
+            playlist = Playlist(playlistname)
+            # Set when the file should be rewritten: it is in the older format
+            # or lists tracks that are no longer in the library.
+            outdated = False
+            # Reads the file one field at a time; the tracks are added while they are parsed.
+            for key, value in readObject(filename, ("tracks",)):
+                if key == "name":
+                    playlist.__name = value
+                elif key == "tracks":
+                    # The total is summed while the tracks are added, so the stored
+                    # "total_seconds" (or the older "total_duration" string) is not needed here.
+                    for track_data in value: # Iterates over each track's data in the 'tracks' field of the file
+                        if library is None:
+                            library = Playlist.getLibrary()
+                        if isinstance(track_data, str):
+                            track = library.getTrackById(track_data)
+                            if track is None:
+                                # Deleted from the library; dropped from the playlist.
+                                outdated = True
+                                continue
+                        else:
+                            # Older files embed whole tracks; they are rewritten as IDs.
+                            track = library.getTrackById(Track.idFromDict(track_data)) or Track.fromDict(track_data)
+                            outdated = True
+                        playlist.insertTrack(track)
+            # Cached before a rewrite below, which then records the new mtime.
+            Playlist.__cache.put(playlistname, playlist, mtime)
+            if outdated:
+                playlist.markDirty()
+            return playlist
         except FileNotFoundError: # If a FileNotFoundError occurs , the exception is caught here.
             return None 
              # Returns None to indicate that the playlist could not be loaded because the file was not found.
@@ -178,7 +314,12 @@ class Playlist:
         current_index = start_index + 1    # Initializes the index for the playlists on the current page, starting at the correct number .
 
         for playlist in page_playlists:
-            display += f"[{current_index}] {playlist}\n"
+            info = Playlist.getPlaylistInfo(playlist)
+            if info:
+                seconds = info["seconds"]
+                display += f"[{current_index}] {playlist} ({info['count']} tracks, {seconds // 60:02}:{seconds % 60:02})\n"
+            else:
+                display += f"[{current_index}] {playlist}\n"
             current_index += 1
 
         display += f"\n<Page {page} of {total_pages}>\n"
@@ -190,22 +331,103 @@ class Playlist:
 
         return display
 
+    @staticmethod
+    def getPlaylistsContaining(track: Track) -> list:
+        """
+        Looks up which playlists contain a track, using the persistent reverse index
+        instead of opening every playlist file.
+
+        Returns:
+            list: The names of the playlists containing the track.
+        """
+        if Playlist.__writer:
+            Playlist.__writer.flush("playlist:")
+        if Playlist.__storage:
+            return Playlist.__storage.getPlaylistsContaining(track)
+        return Playlist.__index.getPlaylistsContaining(track)
+
+    @staticmethod
+    def useStorage(storage):
+        """
+        Keeps every playlist in a storage engine (such as SQLiteStorage)
+        instead of the JSON files in Data/Playlists; None goes back to the files.
+        """
+        Playlist.__storage = storage
+
+    @staticmethod
+    def getStorage():
+        """
+        Returns:
+            The storage engine holding the playlists, or None for the JSON files.
+        """
+        return Playlist.__storage
+
+    @staticmethod
+    def useLibrary(loader):
+        """
+        Sets where the track IDs stored in playlist files are looked up.
+
+        Parameters:
+            loader (function): Returns the LibraryContainer; only called when
+            a playlist with tracks is loaded, so the library can load lazily.
+        """
+        Playlist.__library = loader
+
+    @staticmethod
+    def getLibrary():
+        if Playlist.__library is None:
+            raise RuntimeError("Playlist.useLibrary() must be called before loading playlist files.")
+        return Playlist.__library()
+
+    @staticmethod
+    def useCache(cache):
+        """
+        Replaces the cache of loaded playlists, e.g. with a PlaylistCache(0)
+        to always read the files.
+        """
+        Playlist.__cache = cache
+
+    @staticmethod
+    def useWriteBehind(writer):
+        """
+        Defers playlist saves to a WriteBehind writer, so a burst of changes
+        to one playlist is written once; None saves every change right away.
+        """
+        Playlist.__writer = writer
+
     @staticmethod      
-    def getPlaylistName(directory = "Data/Playlists"):
-        playlist_names = []
-        try:
-            files = os.listdir(directory)
-            for file in files:
-                if len(file) > 5 and file[-5:] == ".json":
-                    playlist_name = file[:-5]
-                    playlist_names += [playlist_name]
-            return playlist_names
-        except FileNotFoundError:
-            print(f"Directory {directory} not found.")
-        return []
+    def getPlaylistName():
+        """
+        Returns:
+            list: The names of all playlists in sorted order, from the catalog.
+        """
+        if Playlist.__storage:
+            return Playlist.__storage.getPlaylistNames()
+        if not Playlist.__catalog.exists():
+            print("Directory Data/Playlists not found.")
+            return []
+        return Playlist.__catalog.getNames()
+
+    @staticmethod
+    def hasPlaylist(name: str) -> bool:
+        """
+        Checks whether a playlist exists, without listing the directory.
+        """
+        return Playlist.getPlaylistInfo(name) is not None
+
+    @staticmethod
+    def getPlaylistInfo(name: str) -> dict:
+        """
+        Returns:
+            dict | None: The "count" of tracks and total "seconds" of a
+            playlist (plus the file "mtime"), or None if it does not exist.
+        """
+        if Playlist.__storage:
+            return Playlist.__storage.getPlaylistInfo(name)
+        return Playlist.__catalog.getEntry(name)
 
     def __str__(self) -> str:
         s = f"\nPlaylist Name: {self.getName()}\nTotal Duration: {self.getTotalDuration()}\nTracks:\n"
-        for track in self.__tracks:
+        for track in self.__tracks.values():
             s += "\t" + track.__str__(True) + "\n"
         return s
@@ -0,0 +1,208 @@
+import json
+import os
+from TrackClass import Track
+from JsonStream import readObject
+
+# Bumped whenever the meaning of the stored track keys changes; an index
+# written with another version is rebuilt from the playlist files.
+INDEX_VERSION = 2
+
+class PlaylistIndex:
+    def __init__(self, directory: str = "Data/Playlists", filename: str = "Data/playlist_index.json"):
+        """
+        Persistent reverse index from tracks to the playlists containing them,
+        so removing a library track only opens the playlists it is really in.
+
+        Saving or deleting a playlist appends one record to a change log next
+        to the index instead of rewriting the whole index. The log is folded
+        into the index once it outgrows it, so the rewrites stay amortized
+        O(1) per change.
+
+        Parameters:
+            directory (str): Where the playlist JSON files live.
+            filename (str): Where the index itself is stored.
+        """
+        self.__directory = directory
+        self.__filename = filename
+        self.__logFile = os.path.splitext(filename)[0] + ".log"
+        self.__playlists = {}  # playlist name -> {"mtime": float, "tracks": set of track keys}
+        self.__members = {}  # track key -> set of playlist names
+        self.__loaded = False
+
+    @staticmethod
+    def trackKey(track) -> str:
+        """
+        Returns:
+            str: The track's stable ID, which is also how playlist files refer to it.
+        """
+        return track.getId()
+
+    @staticmethod
+    def readTrackKeys(filename: str) -> set:
+        """
+        Reads the track keys of a playlist file without resolving its tracks,
+        so the index never needs the library. Handles both the ID lists and
+        the older files that embed whole tracks.
+        """
+        keys = set()
+        for key, value in readObject(filename, ("tracks",)):
+            if key == "tracks":
+                for element in value:
+                    keys.add(element if isinstance(element, str) else Track.idFromDict(element))
+        return keys
+
+    def load(self):
+        """
+        Reads the stored index, then re-reads only the playlist files that were
+        added or modified since it was written and forgets deleted ones.
+        Runs once, on first use.
+        """
+        if self.__loaded:
+            return
+        self.__loaded = True
+
+        try:
+            with open(self.__filename, 'r') as file:
+                stored = json.load(file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            stored = {}
+        current = stored.get("version") == INDEX_VERSION
+        for name, entry in (stored.get("playlists", {}) if current else {}).items():
+            self.link(name, set(entry["tracks"]), entry["mtime"])
+        # The log only holds changes made on top of an index of this version.
+        if current or not stored:
+            self.replayLog()
+
+        try:
+            files = os.listdir(self.__directory)
+        except FileNotFoundError:
+            files = []
+
+        current = {}
+        for file in files:
+            if len(file) > 5 and file[-5:] == ".json":
+                current[file[:-5]] = os.path.getmtime(os.path.join(self.__directory, file))
+
+        changed = False
+        for name in list(self.__playlists):
+            if name not in current:
+                self.unlink(name)
+                changed = True
+
+        for name, mtime in current.items():
+            entry = self.__playlists.get(name)
+            if entry is None or entry["mtime"] != mtime:
+                try:
+                    keys = self.readTrackKeys(os.path.join(self.__directory, name + ".json"))
+                except (FileNotFoundError, json.JSONDecodeError):
+                    keys = set()
+                self.link(name, keys, mtime)
+                changed = True
+
+        if changed:
+            self.save()
+
+    def link(self, name: str, keys: set, mtime: float):
+        """
+        Replaces the recorded contents of a playlist in memory.
+        """
+        self.unlink(name)
+        self.__playlists[name] = {"mtime": mtime, "tracks": keys}
+        for key in keys:
+            self.__members.setdefault(key, set()).add(name)
+
+    def unlink(self, name: str):
+        """
+        Forgets a playlist in memory.
+        """
+        entry = self.__playlists.pop(name, None)
+        if entry is None:
+            return
+        for key in entry["tracks"]:
+            names = self.__members.get(key)
+            if names is not None:
+                names.discard(name)
+                if not names:
+                    del self.__members[key]
+
+    def replayLog(self):
+        """
+        Applies the changes logged since the index was last written. A torn
+        or lost record only leaves a stale mtime behind, and load() re-reads
+        playlists whose mtime does not match.
+        """
+        try:
+            with open(self.__logFile, 'r') as file:
+                lines = file.readlines()
+        except FileNotFoundError:
+            return
+        for line in lines:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if "drop" in record:
+                self.unlink(record["drop"])
+            elif "set" in record:
+                self.link(record["set"], set(record["tracks"]), record["mtime"])
+
+    def log(self, record: dict):
+        """
+        Appends a change to the log, folding the log into the index once it
+        is larger than the index itself.
+        """
+        with open(self.__logFile, 'a') as file:
+            file.write("\n" + json.dumps(record, separators=(",", ":")) + "\n")
+            logSize = file.tell()
+        try:
+            indexSize = os.path.getsize(self.__filename)
+        except FileNotFoundError:
+            indexSize = 0
+        if logSize > max(indexSize, 1 << 16):
+            self.save()
+
+    def save(self):
+        """
+        Writes the whole index to disk and clears the change log.
+        """
+        temporary = self.__filename + ".tmp"
+        with open(temporary, 'w') as file:
+            json.dump({"version": INDEX_VERSION,
+                       "playlists": {name: {"mtime": entry["mtime"], "tracks": sorted(entry["tracks"])}
+                                     for name, entry in self.__playlists.items()}},
+                      file, separators=(",", ":"))
+        os.replace(temporary, self.__filename)
+        # Replaying the log again would be harmless, so a crash here loses nothing.
+        if os.path.exists(self.__logFile):
+            os.remove(self.__logFile)
+
+    def setPlaylist(self, name: str, trackIds: list, mtime: float):
+        """
+        Records the saved contents of a playlist.
+
+        Parameters:
+            name (str): The playlist name.
+            trackIds (list): The IDs of the tracks it now contains, as written
+            to its file (see trackKey).
+            mtime (float): The modification time of its file after saving.
+        """
+        self.load()
+        keys = set(trackIds)
+        self.link(name, keys, mtime)
+        self.log({"set": name, "mtime": mtime, "tracks": sorted(keys)})
+
+    def dropPlaylist(self, name: str):
+        """
+        Records that a playlist was deleted.
+        """
+        self.load()
+        self.unlink(name)
+        self.log({"drop": name})
+
+    def getPlaylistsContaining(self, track) -> list:
+        """
+        Returns:
+            list: The names of the playlists containing the track, sorted.
+        """
+        self.load()
+        return sorted(self.__members.get(self.trackKey(track), ()))
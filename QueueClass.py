@@ -1,7 +1,28 @@
-import json
 from TrackClass import Track
+from JsonStream import readObject, writeObject
 
 class MusicQueue:
+    # Storage engine holding the queue state instead of Data/queue.json, if any.
+    __storage = None
+    # Write-behind writer that coalesces queue saves, if any.
+    __writer = None
+
+    @staticmethod
+    def useStorage(storage):
+        """
+        Keeps the queue state in a storage engine (such as SQLiteStorage)
+        instead of Data/queue.json; None goes back to the file.
+        """
+        MusicQueue.__storage = storage
+
+    @staticmethod
+    def useWriteBehind(writer):
+        """
+        Defers queue saves to a WriteBehind writer, so a burst of changes
+        is written once; None saves every change right away.
+        """
+        MusicQueue.__writer = writer
+
     def __init__(self) -> None:
         self.__queue = []
         self.__orig = []
@@ -122,7 +143,7 @@ class MusicQueue:
         self.__repeat = False
         self.__shuffle = False
         self.__playing = False
-        self.saveState()
+        self.markDirty()
 
     def formatDuration(self, total_seconds):
         """Format duration from total seconds to 'X hr Y min Z sec' without divmod or ord
@@ -212,8 +233,8 @@ class MusicQueue:
         data = {
             "source": source,
             "playlist_name": playlist_name,
-            "queue": [track.toDict() for track in self.__queue],
-            "orig": [track.toDict() for track in self.__orig],
+            "queue": (track.toDict() for track in self.__queue),
+            "orig": (track.toDict() for track in self.__orig),
             "current_index": self.__currentIndex,
             "total_duration": self.__total_duration,
             "repeat": self.__repeat,
@@ -221,25 +242,61 @@ class MusicQueue:
             "playing": self.__playing
         }
         
-        # Write data to 'queue.json'
-        with open("Data/queue.json", "w") as file:
-            json.dump(data, file, indent=4)
+        if MusicQueue.__storage:
+            MusicQueue.__storage.saveQueueState(data)
+            return
+
+        # Write data to 'queue.json', streaming the track lists.
+        writeObject("Data/queue.json", data, indent=4, streamKeys=("queue", "orig"))
     
+    def saveCurrentState(self):
+        """
+        Saves the queue under the source and playlist it was loaded for.
+        """
+        if self.source == "Playlist":
+            self.saveState("Playlist", self.playlist_name)
+        else:
+            self.saveState()
+
+    def markDirty(self):
+        """
+        Records that the queue changed. With a write-behind writer the save
+        is deferred and coalesced; otherwise it is saved right away.
+        """
+        if MusicQueue.__writer:
+            MusicQueue.__writer.markDirty("queue", self.saveCurrentState)
+        else:
+            self.saveCurrentState()
+
     def loadState(self):
         """
-        Loads the saved queue state from a JSON file, including its source and associated playlist.
+        Loads the saved queue state from a JSON file (or the storage engine), including its source and associated playlist.
         """
-        with open("Data/queue.json", "r") as file:
-            data = json.load(file)
-            self.source = data["source"]
-            self.playlist_name = data.get("playlist_name")
-            self.__queue = [Track.fromDict(track_data) for track_data in data["queue"]]
-            self.__orig = [Track.fromDict(track_data) for track_data in data["orig"]]
-            self.__currentIndex = data["current_index"]
-            self.__total_duration = data["total_duration"]
-            self.__repeat = data["repeat"]
-            self.__shuffle = data["shuffle"]
-            self.__playing = data["playing"]
+        if MusicQueue.__writer:
+            # Write a deferred save first, so the state read is the latest.
+            MusicQueue.__writer.flush("queue")
+        if MusicQueue.__storage:
+            data = MusicQueue.__storage.loadQueueState()
+            if data is None:
+                return
+            items = data.items()
+        else:
+            items = readObject("Data/queue.json", ("queue", "orig"))
+
+        # The track lists are turned into Tracks while they are read.
+        data = {}
+        for key, value in items:
+            data[key] = [Track.fromDict(track_data) for track_data in value] if key in ("queue", "orig") else value
+
+        self.source = data["source"]
+        self.playlist_name = data.get("playlist_name")
+        self.__queue = data["queue"]
+        self.__orig = data["orig"]
+        self.__currentIndex = data["current_index"]
+        self.__total_duration = data["total_duration"]
+        self.__repeat = data["repeat"]
+        self.__shuffle = data["shuffle"]
+        self.__playing = data["playing"]
 
             
     def play(self):
@@ -273,11 +330,6 @@ class MusicQueue:
         This ensures seamless interaction while maintaining the queue's state and behavior.
         """
         while True:
-            if self.source == "Library":
-                self.saveState()
-            else:
-                self.saveState("Playlist", self.playlist_name)
-                
             self.displayQueue()
             print("\nOptions:")
             print("[1] Play")
@@ -288,10 +340,12 @@ class MusicQueue:
             print("[6] Turn off Shuffle" if self.__shuffle else "[6] Turn on Shuffle")
             print("[7] Clear Queue")
             print("[0] Exit")
-            choice = input("Enter your choice: ")
+            if MusicQueue.__writer:
+                choice = MusicQueue.__writer.idleInput("Enter your choice: ")
+            else:
+                choice = input("Enter your choice: ")
 
             if choice == "0":
-                self.saveState()
                 print("Exiting __queue interface.")
                 break
             elif choice == "1":
@@ -318,6 +372,9 @@ class MusicQueue:
                 self.clearQueue()
             else:
                 print("Invalid choice. Try again.")
+                continue
+            # Only commands that changed the queue get it saved.
+            self.markDirty()
 
 
     
\ No newline at end of file
@@ -0,0 +1,373 @@
+import json
+import os
+import sqlite3
+import sys
+from TrackClass import Track
+from JsonStream import readArray, readObject, writeArray, writeObject
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tracks (
+    id INTEGER PRIMARY KEY,
+    title TEXT NOT NULL,
+    artist TEXT NOT NULL,
+    album TEXT NOT NULL,
+    duration TEXT NOT NULL,
+    seconds INTEGER NOT NULL,
+    additional_artists TEXT NOT NULL DEFAULT '[]',
+    UNIQUE (title, artist, album, duration)
+);
+CREATE INDEX IF NOT EXISTS tracks_artist ON tracks (artist);
+CREATE INDEX IF NOT EXISTS tracks_album ON tracks (album);
+
+CREATE TABLE IF NOT EXISTS playlists (
+    name TEXT PRIMARY KEY
+);
+CREATE TABLE IF NOT EXISTS playlist_tracks (
+    playlist TEXT NOT NULL REFERENCES playlists (name) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    track_id INTEGER NOT NULL REFERENCES tracks (id) ON DELETE CASCADE,
+    PRIMARY KEY (playlist, position)
+);
+CREATE INDEX IF NOT EXISTS playlist_tracks_track ON playlist_tracks (track_id);
+
+CREATE TABLE IF NOT EXISTS queue_state (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    source TEXT,
+    playlist_name TEXT,
+    current_index INTEGER NOT NULL,
+    total_duration INTEGER NOT NULL,
+    repeat INTEGER NOT NULL,
+    shuffle INTEGER NOT NULL,
+    playing INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS queue_tracks (
+    list TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    title TEXT NOT NULL,
+    artist TEXT NOT NULL,
+    album TEXT NOT NULL,
+    duration TEXT NOT NULL,
+    additional_artists TEXT NOT NULL DEFAULT '[]',
+    PRIMARY KEY (list, position)
+);
+"""
+
+TRACK_COLUMNS = "tracks.title, tracks.artist, tracks.album, tracks.duration, tracks.additional_artists"
+
+class SQLiteStorage:
+    def __init__(self, filename: str = "Data/music.db"):
+        """
+        Opens (and creates if needed) the SQLite database holding the library,
+        the playlists and the queue. Every change is its own small transaction,
+        so adding or removing one track never rewrites anything else.
+
+        Parameters:
+            filename (str): Path of the database file.
+        """
+        self.__isNew = not os.path.exists(filename)
+        # Deferred saves run on the write-behind thread; WriteBehind's lock
+        # already keeps them from overlapping with the main thread.
+        self.__connection = sqlite3.connect(filename, check_same_thread=False)
+        self.__connection.execute("PRAGMA foreign_keys = ON")
+        self.__connection.executescript(SCHEMA)
+
+    def isNew(self) -> bool:
+        """
+        Returns:
+            bool: True if the database file did not exist before it was opened.
+        """
+        return self.__isNew
+
+    def close(self):
+        self.__connection.close()
+
+    @staticmethod
+    def rowToTrack(row) -> Track:
+        """
+        Builds (or reuses) the Track for a (title, artist, album, duration, additional_artists) row.
+        """
+        return Track.fromDict({
+            "title": row[0],
+            "artist": row[1],
+            "album": row[2],
+            "duration": row[3],
+            "additional_artists": json.loads(row[4])
+        })
+
+    def insertTrackRow(self, track: Track) -> int:
+        """
+        Inserts a track row if it is missing, inside the caller's transaction.
+
+        Returns:
+            int: The row id of the track.
+        """
+        self.__connection.execute(
+            "INSERT OR IGNORE INTO tracks (title, artist, album, duration, seconds, additional_artists) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (track.getTitle(), track.getArtist(), track.getAlbum(), track.getDuration(),
+             track.getDurationInSeconds(), json.dumps(track.getAdditionalArtists())))
+        return self.getTrackId(track)
+
+    def getTrackId(self, track: Track) -> int:
+        """
+        Returns:
+            int: The row id of a track, or None if it is not stored.
+        """
+        row = self.__connection.execute(
+            "SELECT id FROM tracks WHERE title = ? AND artist = ? AND album = ? AND duration = ?",
+            track.getSortKey()).fetchone()
+        return row[0] if row else None
+
+    # Library
+
+    def addTrack(self, track: Track):
+        with self.__connection:
+            self.insertTrackRow(track)
+
+    def removeTrack(self, track: Track):
+        """
+        Deletes a track; its playlist entries go with it.
+        """
+        with self.__connection:
+            self.__connection.execute(
+                "DELETE FROM tracks WHERE title = ? AND artist = ? AND album = ? AND duration = ?",
+                track.getSortKey())
+
+    def checkpoint(self, library):
+        """
+        Nothing to do: every change is committed as it is made.
+        """
+
+    def loadTracks(self) -> list:
+        """
+        Returns:
+            list: Every library track, in library order.
+        """
+        rows = self.__connection.execute(
+            f"SELECT {TRACK_COLUMNS} FROM tracks ORDER BY title, artist, album, duration")
+        return [self.rowToTrack(row) for row in rows]
+
+    def saveTracks(self, tracks):
+        """
+        Makes the stored library match the given tracks, touching only the rows that differ.
+        """
+        with self.__connection:
+            wanted = {track.getSortKey(): track for track in tracks}
+            stored = set(self.__connection.execute("SELECT title, artist, album, duration FROM tracks"))
+            for key in stored - set(wanted):
+                self.__connection.execute(
+                    "DELETE FROM tracks WHERE title = ? AND artist = ? AND album = ? AND duration = ?", key)
+            for key in set(wanted) - stored:
+                self.insertTrackRow(wanted[key])
+
+    # Playlists
+
+    def deletePlaylist(self, name: str) -> bool:
+        """
+        Returns:
+            bool: True if the playlist existed and was deleted.
+        """
+        with self.__connection:
+            return self.__connection.execute("DELETE FROM playlists WHERE name = ?", (name,)).rowcount > 0
+
+    def getPlaylistNames(self) -> list:
+        return [row[0] for row in self.__connection.execute("SELECT name FROM playlists ORDER BY name")]
+
+    def getPlaylistInfo(self, name: str) -> dict:
+        """
+        Returns:
+            dict | None: The "count" of tracks and total "seconds" of a
+            playlist, or None if there is no such playlist.
+        """
+        if not self.__connection.execute("SELECT 1 FROM playlists WHERE name = ?", (name,)).fetchone():
+            return None
+        count, seconds = self.__connection.execute(
+            "SELECT COUNT(*), COALESCE(SUM(tracks.seconds), 0) FROM playlist_tracks "
+            "JOIN tracks ON tracks.id = playlist_tracks.track_id WHERE playlist_tracks.playlist = ?", (name,)).fetchone()
+        return {"count": count, "seconds": seconds, "mtime": None}
+
+    def savePlaylist(self, name: str, tracks: list):
+        """
+        Stores a playlist. Rows matching the stored order are kept and only
+        the rest is rewritten after them. Removals leave gaps in the stored
+        positions, so rows are matched by order, not by position. Playlist
+        rows point at library tracks; tracks no longer in the library are
+        left out.
+        """
+        with self.__connection:
+            self.__connection.execute("INSERT OR IGNORE INTO playlists (name) VALUES (?)", (name,))
+            stored = self.__connection.execute(
+                "SELECT position, track_id FROM playlist_tracks WHERE playlist = ? ORDER BY position",
+                (name,)).fetchall()
+            wanted = [trackId for trackId in map(self.getTrackId, tracks) if trackId is not None]
+
+            keep = 0
+            while keep < len(stored) and keep < len(wanted) and stored[keep][1] == wanted[keep]:
+                keep += 1
+            # The first free position after the kept rows.
+            start = stored[keep - 1][0] + 1 if keep else 0
+            if keep < len(stored):
+                self.__connection.execute(
+                    "DELETE FROM playlist_tracks WHERE playlist = ? AND position >= ?", (name, start))
+            self.__connection.executemany(
+                "INSERT INTO playlist_tracks (playlist, position, track_id) VALUES (?, ?, ?)",
+                [(name, start + offset, trackId) for offset, trackId in enumerate(wanted[keep:])])
+
+    def appendPlaylistTrack(self, name: str, track: Track):
+        """
+        Adds a track to the end of a playlist by inserting its single row.
+        A track no longer in the library is left out.
+        """
+        with self.__connection:
+            self.__connection.execute("INSERT OR IGNORE INTO playlists (name) VALUES (?)", (name,))
+            self.__connection.execute(
+                "INSERT INTO playlist_tracks (playlist, position, track_id) "
+                "SELECT ?, (SELECT COALESCE(MAX(position) + 1, 0) FROM playlist_tracks WHERE playlist = ?), id "
+                "FROM tracks WHERE title = ? AND artist = ? AND album = ? AND duration = ?",
+                (name, name, *track.getSortKey()))
+
+    def removePlaylistTrack(self, name: str, track: Track):
+        """
+        Removes a track from a playlist by deleting its single row.
+        """
+        with self.__connection:
+            self.__connection.execute(
+                "DELETE FROM playlist_tracks WHERE playlist = ? AND track_id = ?",
+                (name, self.getTrackId(track)))
+
+    def loadPlaylistTracks(self, name: str) -> list:
+        """
+        Returns:
+            list: The tracks of a playlist in playlist order, or None if there is no such playlist.
+        """
+        if not self.__connection.execute("SELECT 1 FROM playlists WHERE name = ?", (name,)).fetchone():
+            return None
+        rows = self.__connection.execute(
+            f"SELECT {TRACK_COLUMNS} FROM playlist_tracks JOIN tracks ON tracks.id = playlist_tracks.track_id "
+            "WHERE playlist_tracks.playlist = ? ORDER BY playlist_tracks.position", (name,))
+        return [self.rowToTrack(row) for row in rows]
+
+    def getPlaylistsContaining(self, track: Track) -> list:
+        rows = self.__connection.execute(
+            "SELECT DISTINCT playlist FROM playlist_tracks WHERE track_id = ? ORDER BY playlist",
+            (self.getTrackId(track),))
+        return [row[0] for row in rows]
+
+    # Queue
+
+    def saveQueueState(self, data: dict):
+        """
+        Stores the queue state. Takes the same dictionary MusicQueue writes to
+        queue.json. Queue entries keep their own copy of each track, as in the
+        JSON file, so they survive the track being removed from the library.
+        """
+        with self.__connection:
+            self.__connection.execute(
+                "INSERT OR REPLACE INTO queue_state "
+                "(id, source, playlist_name, current_index, total_duration, repeat, shuffle, playing) "
+                "VALUES (1, ?, ?, ?, ?, ?, ?, ?)",
+                (data["source"], data["playlist_name"], data["current_index"], data["total_duration"],
+                 data["repeat"], data["shuffle"], data["playing"]))
+            self.__connection.execute("DELETE FROM queue_tracks")
+            self.__connection.executemany(
+                "INSERT INTO queue_tracks (list, position, title, artist, album, duration, additional_artists) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(listName, position, trackData["title"], trackData["artist"], trackData["album"],
+                  trackData["duration"], json.dumps(trackData.get("additional_artists", [])))
+                 for listName in ("queue", "orig")
+                 for position, trackData in enumerate(data[listName])])
+
+    def loadQueueState(self) -> dict:
+        """
+        Returns:
+            dict: The queue state in the same shape as queue.json, or None if none was saved.
+        """
+        row = self.__connection.execute(
+            "SELECT source, playlist_name, current_index, total_duration, repeat, shuffle, playing "
+            "FROM queue_state WHERE id = 1").fetchone()
+        if row is None:
+            return None
+
+        data = {
+            "source": row[0],
+            "playlist_name": row[1],
+            "current_index": row[2],
+            "total_duration": row[3],
+            "repeat": bool(row[4]),
+            "shuffle": bool(row[5]),
+            "playing": bool(row[6])
+        }
+        for listName in ("queue", "orig"):
+            rows = self.__connection.execute(
+                "SELECT title, artist, album, duration, additional_artists FROM queue_tracks "
+                "WHERE list = ? ORDER BY position", (listName,))
+            data[listName] = [{
+                "title": title,
+                "artist": artist,
+                "album": album,
+                "duration": duration,
+                "additional_artists": json.loads(additional)
+            } for title, artist, album, duration, additional in rows]
+        return data
+
+    # JSON import and export
+
+    def importJson(self, directory: str = "Data"):
+        """
+        Copies tracks.json, every Playlists/<name>.json and queue.json into the database.
+        """
+        filename = os.path.join(directory, "tracks.json")
+        tracks = []
+        if os.path.exists(filename):
+            tracks = [Track.fromDict(data) for data in readArray(filename)]
+            self.saveTracks(tracks)
+        # Playlist files list track IDs; older ones embed the tracks themselves.
+        byId = {track.getId(): track for track in tracks}
+
+        playlistDirectory = os.path.join(directory, "Playlists")
+        files = os.listdir(playlistDirectory) if os.path.isdir(playlistDirectory) else []
+        for file in files:
+            if len(file) > 5 and file[-5:] == ".json":
+                for key, value in readObject(os.path.join(playlistDirectory, file), ("tracks",)):
+                    if key == "tracks":
+                        self.savePlaylist(file[:-5], [
+                            Track.fromDict(element) if isinstance(element, dict) else byId[element]
+                            for element in value if isinstance(element, dict) or element in byId])
+
+        filename = os.path.join(directory, "queue.json")
+        if os.path.exists(filename):
+            self.saveQueueState({key: list(value) if key in ("queue", "orig") else value
+                                 for key, value in readObject(filename, ("queue", "orig"))})
+
+    def exportJson(self, directory: str = "Data"):
+        """
+        Writes the database back out as tracks.json, Playlists/<name>.json and queue.json.
+        """
+        playlistDirectory = os.path.join(directory, "Playlists")
+        os.makedirs(playlistDirectory, exist_ok=True)
+        writeArray(os.path.join(directory, "tracks.json"), (track.toDict() for track in self.loadTracks()), indent=2)
+
+        for name in self.getPlaylistNames():
+            tracks = self.loadPlaylistTracks(name)
+            writeObject(os.path.join(playlistDirectory, f"{name}.json"), {
+                "name": name,
+                "total_seconds": sum(track.getDurationInSeconds() for track in tracks),
+                "tracks": (track.getId() for track in tracks)
+            }, indent=2, streamKeys=("tracks",))
+
+        data = self.loadQueueState()
+        if data is not None:
+            writeObject(os.path.join(directory, "queue.json"), data, indent=4)
+
+if __name__ == "__main__":
+    # python SQLiteStorage.py import|export [database] [data directory]
+    if len(sys.argv) < 2 or sys.argv[1] not in ("import", "export"):
+        print("Usage: python SQLiteStorage.py import|export [database] [data directory]")
+    else:
+        storage = SQLiteStorage(sys.argv[2] if len(sys.argv) > 2 else "Data/music.db")
+        directory = sys.argv[3] if len(sys.argv) > 3 else "Data"
+        if sys.argv[1] == "import":
+            storage.importJson(directory)
+        else:
+            storage.exportJson(directory)
+        storage.close()
@@ -0,0 +1,106 @@
+import re
+from TrackClass import Track
+
+class SearchIndex:
+    def __init__(self):
+        # token -> {track: number of times the token appears in the track's fields}
+        self.__postings = {}
+
+    @staticmethod
+    def tokenize(text: str) -> list:
+        """
+        Splits text into lowercase word tokens.
+
+        Parameters:
+            text (str): The text to split.
+
+        Returns:
+            list: The tokens, in the order they appear.
+        """
+        return re.findall(r"\w+", text.lower())
+
+    def trackTokens(self, track: Track) -> dict:
+        """
+        Collects the searchable tokens of a track from its title, main artist,
+        album and additional artists.
+
+        Returns:
+            dict: Each token mapped to how many times it appears.
+        """
+        counts = {}
+        fields = [track.getTitle(), track.getArtist(), track.getAlbum()] + list(track.getAdditionalArtists())
+        for field in fields:
+            for token in self.tokenize(field):
+                counts[token] = counts.get(token, 0) + 1
+        return counts
+
+    def addTrack(self, track: Track):
+        """
+        Adds a track to the posting list of each of its tokens.
+        """
+        for token, hits in self.trackTokens(track).items():
+            posting = self.__postings.get(token)
+            if posting is None:
+                self.__postings[token] = {track: hits}
+            else:
+                posting[track] = hits
+
+    def removeTrack(self, track: Track):
+        """
+        Removes a track from the posting lists it appears in.
+        """
+        for token in self.trackTokens(track):
+            posting = self.__postings.get(token)
+            if posting is None:
+                continue
+            posting.pop(track, None)
+            if not posting:
+                del self.__postings[token]
+
+    def clear(self):
+        self.__postings = {}
+
+    def search(self, query: str, mode: str = "and", limit: int | None = None) -> list:
+        """
+        Finds tracks matching the keywords in a query. Only the posting lists
+        of the query tokens are read, never the whole library.
+
+        Parameters:
+            query (str): Free text; it is tokenized the same way as the tracks.
+            mode (str): "and" to require every keyword, "or" to accept any.
+            limit (int | None): Maximum number of results, or None for all.
+
+        Returns:
+            list: Matching tracks, best first. Tracks matching more distinct
+            keywords rank higher, then tracks with more keyword occurrences,
+            then the library order.
+        """
+        tokens = []
+        for token in self.tokenize(query):
+            if token not in tokens:
+                tokens += [token]
+        if not tokens:
+            return []
+
+        postings = [self.__postings.get(token, {}) for token in tokens]
+        scores = {}
+
+        if mode == "or":
+            for posting in postings:
+                for track, hits in posting.items():
+                    matched, total = scores.get(track, (0, 0))
+                    scores[track] = (matched + 1, total + hits)
+        else:
+            # Intersect starting from the shortest posting list.
+            postings.sort(key=len)
+            for track, hits in postings[0].items():
+                total = hits
+                for posting in postings[1:]:
+                    if track not in posting:
+                        break
+                    total += posting[track]
+                else:
+                    scores[track] = (len(tokens), total)
+
+        ranked = sorted(scores, key=lambda track: (-scores[track][0], -scores[track][1], track.getSortKey()))
+        return ranked if limit is None else ranked[:limit]
@@ -0,0 +1,109 @@
+import bisect
+from TrackClass import Track
+
+class SecondaryIndex:
+    def __init__(self, keysOf):
+        """
+        Initializes an ordered index of tracks grouped by a secondary key.
+
+        Parameters:
+            keysOf (function): Returns the list of keys a track is filed under.
+        """
+        self.__keysOf = keysOf
+        self.__buckets = {}  # key -> tracks in library order
+        self.__keys = []  # every key, sorted
+
+    @staticmethod
+    def artistKeys(track: Track) -> list:
+        """
+        Keys for the artist index: the main artist and every additional artist.
+        """
+        keys = [track.getArtist()]
+        for artist in track.getAdditionalArtists():
+            if artist not in keys:
+                keys += [artist]
+        return keys
+
+    @staticmethod
+    def albumKeys(track: Track) -> list:
+        """
+        Keys for the album index: the album title.
+        """
+        return [track.getAlbum()]
+
+    def addTrack(self, track: Track):
+        """
+        Files a track under each of its keys, keeping every bucket in library order.
+        """
+        for key in self.__keysOf(track):
+            bucket = self.__buckets.get(key)
+            if bucket is None:
+                self.__buckets[key] = [track]
+                bisect.insort(self.__keys, key)
+            else:
+                bisect.insort(bucket, track, key=Track.getSortKey)
+
+    def removeTrack(self, track: Track):
+        """
+        Removes a track from the buckets of each of its keys.
+        """
+        for key in self.__keysOf(track):
+            bucket = self.__buckets.get(key)
+            if bucket is None:
+                continue
+            for index in range(len(bucket)):
+                if bucket[index] is track:
+                    bucket.pop(index)
+                    break
+            if not bucket:
+                del self.__buckets[key]
+                del self.__keys[bisect.bisect_left(self.__keys, key)]
+
+    def rebuild(self, tracks):
+        """
+        Rebuilds the index from tracks given in library order, sorting the keys once.
+        """
+        self.__buckets = {}
+        for track in tracks:
+            for key in self.__keysOf(track):
+                bucket = self.__buckets.get(key)
+                if bucket is None:
+                    self.__buckets[key] = [track]
+                else:
+                    bucket.append(track)
+        self.__keys = sorted(self.__buckets)
+
+    def getCount(self, key: str) -> int:
+        """
+        Returns:
+            int: The number of tracks filed under a key.
+        """
+        return len(self.__buckets.get(key, []))
+
+    def getTracks(self, key: str, page: int | None = None, pageSize: int = 10) -> list:
+        """
+        Looks up the tracks filed under a key.
+
+        Parameters:
+            key (str): The artist or album to look up.
+            page (int | None): The 1-based page to return, or None for all tracks.
+            pageSize (int): The number of tracks per page.
+
+        Returns:
+            list: The tracks in library order; only the requested page is copied.
+        """
+        bucket = self.__buckets.get(key, [])
+        if page is None:
+            return list(bucket)
+        start = (page - 1) * pageSize
+        return bucket[start:start + pageSize]
+
+    def getKeys(self, prefix: str = "") -> list:
+        """
+        Lists the keys in sorted order, optionally only those starting with prefix.
+        """
+        start = bisect.bisect_left(self.__keys, prefix)
+        end = start
+        while end < len(self.__keys) and self.__keys[end].startswith(prefix):
+            end += 1
+        return self.__keys[start:end]
@@ -0,0 +1,132 @@
+from TrackClass import Track
+from SortedArrayLibrary import SortedArrayLibrary
+from LibrarySnapshot import LibrarySnapshot
+import os
+
+class SnapshotLibrary(SortedArrayLibrary):
+    """
+    Library backend that starts from a memory-mapped LibrarySnapshot.
+    Loading only maps the file; sorted access, paging, order statistics and
+    key lookups read the mapped records directly and build Track objects
+    only for the entries they touch.
+
+    The first edit copies the snapshot into the sorted list of
+    SortedArrayLibrary, which takes over from then on. saveToJson writes a
+    fresh snapshot next to tracks.json, so the next start is fast again.
+    """
+
+    # The snapshot already is the on-disk image; no pickled cache as well.
+    CACHEABLE = False
+
+    def __init__(self):
+        super().__init__()
+        self.__snapshot = None
+        self.__snapshotFile = None
+
+    @staticmethod
+    def snapshotFile(filename: str) -> str:
+        """
+        Returns:
+            str: The snapshot path kept next to a JSON file, e.g. Data/tracks.snap.
+        """
+        return os.path.splitext(filename)[0] + ".snap"
+
+    def openSnapshot(self, filename: str) -> bool:
+        """
+        Replaces the library contents with a snapshot file.
+
+        Returns:
+            bool: True if the file was a valid snapshot.
+        """
+        try:
+            snapshot = LibrarySnapshot(filename)
+        except (OSError, ValueError):
+            return False
+        self.__snapshot = snapshot
+        self.__snapshotFile = filename
+        super().buildStructure([])
+        self.invalidateIndexes()
+        return True
+
+    def materialize(self):
+        """
+        Copies the snapshot into the sorted list before the first edit.
+        """
+        if self.__snapshot is not None:
+            snapshot = self.__snapshot
+            self.__snapshot = None
+            super().buildStructure(list(snapshot.iterFrom(0)))
+            snapshot.close()
+
+    def insertIfAbsent(self, track: Track) -> bool:
+        self.materialize()
+        return super().insertIfAbsent(track)
+
+    def deleteIfPresent(self, track: Track) -> Track:
+        self.materialize()
+        return super().deleteIfPresent(track)
+
+    def buildStructure(self, tracks: list):
+        if self.__snapshot is not None:
+            self.__snapshot.close()
+            self.__snapshot = None
+        super().buildStructure(tracks)
+
+    def iterFrom(self, index: int):
+        if self.__snapshot is not None:
+            return self.__snapshot.iterFrom(index)
+        return super().iterFrom(index)
+
+    def iterFromKey(self, key: tuple):
+        if self.__snapshot is not None:
+            return self.__snapshot.iterFrom(self.__snapshot.bisectKey(key))
+        return super().iterFromKey(key)
+
+    def getSize(self) -> int:
+        if self.__snapshot is not None:
+            return len(self.__snapshot)
+        return super().getSize()
+
+    def getTotalSeconds(self) -> int:
+        if self.__snapshot is not None:
+            return self.__snapshot.getTotalSeconds()
+        return super().getTotalSeconds()
+
+    def select(self, index: int) -> Track:
+        if self.__snapshot is not None:
+            return self.__snapshot.getTrack(index) if 0 <= index < len(self.__snapshot) else None
+        return super().select(index)
+
+    def rank(self, track: Track) -> int:
+        if self.__snapshot is not None:
+            return self.__snapshot.bisectKey(track.getSortKey())
+        return super().rank(track)
+
+    def getSortedTracks(self) -> list:
+        if self.__snapshot is not None:
+            return list(self.__snapshot.iterFrom(0))
+        return super().getSortedTracks()
+
+    def loadFromJson(self, filename="Data/tracks.json", bulk: bool = True):
+        """
+        Maps the snapshot kept next to the JSON file when it is at least as
+        new as the file, otherwise loads the JSON and writes a new snapshot.
+        With a storage engine set, loading is left to the engine.
+        """
+        snapshot = self.snapshotFile(filename)
+        if self.getStorage() is None and not self.getSize() and os.path.exists(snapshot):
+            if not os.path.exists(filename) or os.path.getmtime(snapshot) >= os.path.getmtime(filename):
+                if self.openSnapshot(snapshot):
+                    return
+
+        super().loadFromJson(filename, bulk)
+        if self.getStorage() is None and os.path.exists(filename):
+            LibrarySnapshot.write(self.getSortedTracks(), snapshot)
+
+    def saveToJson(self, filename="Data/tracks.json"):
+        # Nothing changed since this snapshot was mapped, and it is newer than the file.
+        if self.__snapshot is not None and self.__snapshotFile == self.snapshotFile(filename):
+            return
+        super().saveToJson(filename)
+        if self.getStorage() is None:
+            LibrarySnapshot.write(self.getSortedTracks(), self.snapshotFile(filename))
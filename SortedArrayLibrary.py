@@ -0,0 +1,89 @@
+from TrackClass import Track
+from LibraryContainer import LibraryContainer
+import bisect
+
+class SortedArrayLibrary(LibraryContainer):
+    """
+    Library backend keeping the tracks in one sorted Python list, with a
+    parallel list of sort keys for bisect. Reads, position lookups and bulk
+    iteration are plain list operations; inserts and deletes shift the list
+    in C, which is fast for libraries that change rarely.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.__tracks = []
+        self.__keys = []
+        self.__totalSeconds = 0
+
+    def insertIfAbsent(self, track: Track) -> bool:
+
+        """
+        Inserts a track unless one with the same title and artist exists.
+
+        Returns:
+            bool: True if the track was inserted.
+        """
+
+        key = track.getSortKey()
+        # A (title, artist) tuple sorts just before every full key that starts with it.
+        index = bisect.bisect_left(self.__keys, key[:2])
+        if index < len(self.__keys) and self.__keys[index][:2] == key[:2]:
+            return False
+
+        self.__keys.insert(index, key)
+        self.__tracks.insert(index, track)
+        self.__totalSeconds += track.getDurationInSeconds()
+        return True
+
+    def deleteIfPresent(self, track: Track) -> Track:
+
+        """
+        Deletes the track with the same sort key.
+
+        Returns:
+            Track: The track object that was removed, or None if not found.
+        """
+
+        key = track.getSortKey()
+        index = bisect.bisect_left(self.__keys, key)
+        if index == len(self.__keys) or self.__keys[index] != key:
+            return None
+
+        del self.__keys[index]
+        removed = self.__tracks.pop(index)
+        self.__totalSeconds -= removed.getDurationInSeconds()
+        return removed
+
+    def buildStructure(self, tracks: list):
+        self.__tracks = list(tracks)
+        self.__keys = [track.getSortKey() for track in self.__tracks]
+        self.__totalSeconds = sum(track.getDurationInSeconds() for track in self.__tracks)
+
+    def iterFrom(self, index: int):
+        # Index directly instead of islice, which would step over the skipped items.
+        tracks = self.__tracks
+        index = max(index, 0)
+        while index < len(tracks):
+            yield tracks[index]
+            index += 1
+
+    def iterFromKey(self, key: tuple):
+        return self.iterFrom(bisect.bisect_left(self.__keys, key))
+
+    def getSize(self) -> int:
+        return len(self.__tracks)
+
+    def getTotalSeconds(self) -> int:
+        return self.__totalSeconds
+
+    def select(self, index: int) -> Track:
+        if 0 <= index < len(self.__tracks):
+            return self.__tracks[index]
+        return None
+
+    def rank(self, track: Track) -> int:
+        return bisect.bisect_left(self.__keys, track.getSortKey())
+
+    def getSortedTracks(self) -> list:
+        return list(self.__tracks)
@@ -1,43 +1,90 @@
+import base64
+import hashlib
+import weakref
+
 class Track:
+    # Fixed attribute slots instead of a per-instance __dict__ keep each track small.
+    # Title, artist, album and duration live only inside the sort key tuple.
+    __slots__ = ("__sort_key", "__additional_artists", "__seconds", "__weakref__")
+
+    # One shared string object per distinct artist/album name.
+    __name_pool = {}
+    # The canonical Track for each sort key, so every loader hands out the same object.
+    __instances = weakref.WeakValueDictionary()
+
     def __init__(self, title: str, main_artist: str, album: str, duration: str, additional_artists: list | None = None):
         """
-        Initializes a Track object with the provided attributes.
+        Initializes a Track object with the provided attributes. The duration is
+        parsed once here and the sort key is built once, since both are
+        immutable and read constantly by the library, playlists and queue.
         """
-        self.__title = title
-        self.__artist = main_artist
-        self.__album = album
-        self.__duration = duration
-        self.__additional_artists = additional_artists or []
+        self.__sort_key = (title, main_artist, album, duration)
+        # Most tracks have no collaborators; don't keep an empty list for each of them.
+        self.__additional_artists = additional_artists or None
+        self.__seconds = Track.parseDuration(duration)
 
     # Getter Methods
-    def getTitle(self): return self.__title
-    def getArtist(self): return self.__artist
-    def getAlbum(self): return self.__album
-    def getDuration(self): return self.__duration
-    def getAdditionalArtists(self): return self.__additional_artists
+    def getTitle(self): return self.__sort_key[0]
+    def getArtist(self): return self.__sort_key[1]
+    def getAlbum(self): return self.__sort_key[2]
+    def getDuration(self): return self.__sort_key[3]
+    def getAdditionalArtists(self): return self.__additional_artists or []
+
+    def getSortKey(self) -> tuple:
+        """
+        Returns the precomputed tuple the library orders tracks by: title, artist, album, duration.
+        """
+        return self.__sort_key
+
+    def getId(self) -> str:
+        """
+        Returns the track's stable ID, derived from its sort key, so it is the
+        same in every session and for every copy of the track. Playlist files
+        refer to tracks by it.
+        """
+        return Track.makeId(*self.__sort_key)
+
+    @staticmethod
+    def makeId(title: str, artist: str, album: str, duration: str) -> str:
+        """
+        Returns:
+            str: A 64-bit hash over title, artist, album and duration, as 11
+            URL-safe base64 characters.
+        """
+        text = "\x1f".join((title, artist, album, duration))
+        digest = hashlib.blake2b(text.encode(), digest_size=8).digest()
+        return base64.urlsafe_b64encode(digest).decode().rstrip("=")
+
+    @staticmethod
+    def idFromDict(data: dict) -> str:
+        """
+        Returns the ID of a track stored as a dictionary, without building the Track.
+        """
+        return Track.makeId(data["title"], data["artist"], data["album"], data["duration"])
 
     def getDurationInSeconds(self) -> int:
         """
-        Converts the object's duration "MM:SS" format to total seconds, by spliting the __duration
-        string by locating the colon (:) and extracts the minutes and seconds, converts them to integers,
-        and calculates the total duration in seconds.
-        
         Returns:
-            int: The total duration in seconds.
+            int: The total duration in seconds, parsed once when the track was created.
         """
-        colon_index = -1
-        index = 0
+        return self.__seconds
 
-        for char in self.__duration:
-            if char == ':':
-                colon_index = index
-                break
-            index += 1
+    @staticmethod
+    def parseDuration(duration: str) -> int:
+        """
+        Converts a duration string to total seconds. Accepts "MM:SS" with any number
+        of minutes (so tracks longer than 99 minutes work) as well as "H:MM:SS".
 
-        minutes = int(self.__duration[:colon_index])
-        seconds = int(self.__duration[colon_index + 1:])
+        Parameters:
+            duration (str): The duration, with colon-separated parts.
 
-        return minutes * 60 + seconds
+        Returns:
+            int: The total duration in seconds.
+        """
+        total = 0
+        for part in duration.split(":"):
+            total = total * 60 + int(part)
+        return total
 
     def toDict(self) -> dict:
         """
@@ -47,11 +94,11 @@ class Track:
             dic: Containing the following keys and their corresponding values.
         """
         return {
-            "title": self.__title,
-            "artist": self.__artist,
-            "additional_artists": self.__additional_artists,
-            "album": self.__album,
-            "duration": self.__duration
+            "title": self.getTitle(),
+            "artist": self.getArtist(),
+            "additional_artists": self.getAdditionalArtists(),
+            "album": self.getAlbum(),
+            "duration": self.getDuration()
         }
 
     @staticmethod
@@ -63,15 +110,37 @@ class Track:
             data (dict): A dictionary conataining keys corresponding to the Track attributes.
 
         Returns:
-            Track (object): Initialized with the data from the dictionary.
-        """
-        return Track(
-            data["title"],
-            data["artist"],
-            data["album"],
-            data["duration"],
-            data.get("additional_artists", [])
-        )
+            Track (object): Initialized with the data from the dictionary, or the
+            already loaded Track with the same title, artist, album and duration.
+        """
+        artist = Track.internName(data["artist"])
+        album = Track.internName(data["album"])
+        existing = Track.__instances.get((data["title"], artist, album, data["duration"]))
+        if existing is not None:
+            return existing
+
+        additional_artists = [Track.internName(name) for name in data.get("additional_artists", [])]
+        return Track.register(Track(data["title"], artist, album, data["duration"], additional_artists))
+
+    @staticmethod
+    def internName(name: str) -> str:
+        """
+        Returns the pooled copy of an artist or album name, so repeated names
+        loaded from JSON share one string object.
+        """
+        return Track.__name_pool.setdefault(name, name)
+
+    @staticmethod
+    def register(track):
+        """
+        Makes a track the canonical instance for its sort key. Later fromDict
+        calls for the same track return it instead of building a copy.
+
+        Returns:
+            Track (object): The registered track.
+        """
+        Track.__instances[track.getSortKey()] = track
+        return track
 
     def __str__(self, compact: bool = False) -> str:
         """
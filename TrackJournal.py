@@ -0,0 +1,161 @@
+import json
+import os
+import threading
+from TrackClass import Track
+from JsonStream import readArray, writeArray
+
+class TrackJournal:
+    def __init__(self, snapshot: str = "Data/tracks.json", filename: str = "Data/tracks.journal",
+                 compactBytes: int = 1 << 20):
+        """
+        Append-only journal of library edits on top of the tracks.json snapshot.
+        Each add or remove is one small fsynced line, so an edit costs O(1) on
+        disk; the journal is folded into a new snapshot once it grows past
+        compactBytes.
+
+        Parameters:
+            snapshot (str): The tracks.json snapshot.
+            filename (str): The journal file.
+            compactBytes (int): Journal size that triggers a compaction.
+        """
+        self.__snapshot = snapshot
+        self.__filename = filename
+        # While a compaction runs, the records it is folding in live here.
+        self.__compacting = filename + ".compacting"
+        self.__compactBytes = compactBytes
+        self.__file = None
+        self.__compaction = None
+
+    @staticmethod
+    def readRecords(filename: str):
+        """
+        Yields the records of a journal file. A torn line from an interrupted
+        write is skipped.
+        """
+        try:
+            with open(filename, 'r') as file:
+                for line in file:
+                    try:
+                        yield json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+        except FileNotFoundError:
+            return
+
+    def loadTracks(self) -> list:
+        """
+        Reads the snapshot and replays the journal on top of it.
+
+        Returns:
+            list: The library tracks, in library order.
+        """
+        tracks = {}
+        if os.path.exists(self.__snapshot):
+            for trackData in readArray(self.__snapshot):
+                track = Track.fromDict(trackData)
+                tracks[track.getSortKey()] = track
+
+        # Records are blind sets and deletes by key, so replaying the records of
+        # an interrupted compaction over the snapshot it may have written is safe.
+        for filename in (self.__compacting, self.__filename):
+            for record in self.readRecords(filename):
+                if "add" in record:
+                    track = Track.fromDict(record["add"])
+                    tracks[track.getSortKey()] = track
+                else:
+                    tracks.pop(tuple(record["remove"]), None)
+
+        return sorted(tracks.values(), key=Track.getSortKey)
+
+    def append(self, record: dict):
+        """
+        Appends one record and forces it to disk before returning.
+        """
+        if self.__file is None:
+            torn = False
+            if os.path.exists(self.__filename) and os.path.getsize(self.__filename) > 0:
+                with open(self.__filename, 'rb') as file:
+                    file.seek(-1, os.SEEK_END)
+                    torn = file.read(1) != b"\n"
+            self.__file = open(self.__filename, 'a')
+            if torn:
+                # Start after a torn line instead of continuing it.
+                self.__file.write("\n")
+        self.__file.write(json.dumps(record, separators=(",", ":")) + "\n")
+        self.__file.flush()
+        os.fsync(self.__file.fileno())
+
+    def addTrack(self, track: Track):
+        self.append({"add": track.toDict()})
+
+    def removeTrack(self, track: Track):
+        self.append({"remove": list(track.getSortKey())})
+
+    def checkpoint(self, library):
+        """
+        Starts a compaction if the journal has grown past the threshold.
+        Called whenever the library is saved.
+
+        Parameters:
+            library (LibraryContainer): The library the journal belongs to.
+        """
+        if self.__compaction and self.__compaction.is_alive():
+            return
+        try:
+            size = os.path.getsize(self.__filename)
+        except FileNotFoundError:
+            return
+        if size >= self.__compactBytes:
+            self.compact(library.getSortedTracks())
+
+    def compact(self, tracks: list, background: bool = True):
+        """
+        Writes a new snapshot of the given tracks and drops the journal records
+        it covers. The current journal is set aside first, so new edits go to
+        a fresh journal while the snapshot is written, by default on a
+        background thread.
+
+        Parameters:
+            tracks (list): The full library, in library order.
+            background (bool): Write the snapshot on a background thread.
+        """
+        if self.__compaction:
+            self.__compaction.join()
+        if self.__file is not None:
+            self.__file.close()
+            self.__file = None
+        if os.path.exists(self.__filename):
+            if os.path.exists(self.__compacting):
+                # Left over from an interrupted compaction; keep its records.
+                with open(self.__filename, 'r') as source, open(self.__compacting, 'a') as target:
+                    target.write(source.read())
+                os.remove(self.__filename)
+            else:
+                os.replace(self.__filename, self.__compacting)
+
+        if background:
+            # Not a daemon thread, so the interpreter waits for it on exit.
+            self.__compaction = threading.Thread(target=self.writeSnapshot, args=(tracks,))
+            self.__compaction.start()
+        else:
+            self.writeSnapshot(tracks)
+
+    def writeSnapshot(self, tracks: list):
+        """
+        Atomically replaces the snapshot, then removes the set-aside journal.
+        """
+        temporary = self.__snapshot + ".tmp"
+        writeArray(temporary, (track.toDict() for track in tracks), indent=2, sync=True)
+        os.replace(temporary, self.__snapshot)
+        if os.path.exists(self.__compacting):
+            os.remove(self.__compacting)
+
+    def close(self):
+        """
+        Waits for a running compaction and closes the journal file.
+        """
+        if self.__compaction:
+            self.__compaction.join()
+        if self.__file is not None:
+            self.__file.close()
+            self.__file = None
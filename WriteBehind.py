@@ -0,0 +1,123 @@
+import sys
+import threading
+import time
+
+class WriteBehind:
+    """
+    Debounced write-behind persistence. Callers mark an object dirty along
+    with the function that saves it; a background thread runs the pending
+    saves once nothing was marked for `delay` seconds, so a burst of edits
+    costs one write per object. flush() writes pending saves immediately,
+    and close() flushes everything on exit.
+
+    Saves touch the same objects the interactive loop edits, so they only
+    run while the writer holds getLock(). The main thread holds it all the
+    time except while it waits for the user in idleInput(). A save that
+    fails is reported and dropped; the other saves still run.
+    """
+
+    def __init__(self, delay: float = 2.0):
+        """
+        Parameters:
+            delay (float): Seconds without new changes before pending saves run.
+        """
+        self.__delay = delay
+        self.__lock = threading.RLock()  # guards the objects being saved
+        self.__changed = threading.Condition()  # guards the fields below
+        self.__pending = {}  # key -> function that saves the object
+        self.__deadline = 0.0
+        self.__closed = False
+        self.__thread = threading.Thread(target=self.run, name="write-behind", daemon=True)
+        self.__thread.start()
+
+    def getLock(self):
+        return self.__lock
+
+    def markDirty(self, key: str, save):
+        """
+        Schedules a save. Marking the same key again before it is written
+        replaces the earlier save, so it is written only once.
+
+        Parameters:
+            key (str): Identifies the object, e.g. "library" or "playlist:Road Trip".
+            save (function): Writes the object; called without arguments.
+        """
+        with self.__changed:
+            if self.__closed:
+                # Nothing would write it after close(); save right away.
+                save()
+                return
+            self.__pending[key] = save
+            self.__deadline = time.monotonic() + self.__delay
+            self.__changed.notify()
+
+    def isDirty(self, key: str) -> bool:
+        with self.__changed:
+            return key in self.__pending
+
+    def discard(self, key: str):
+        """
+        Drops a pending save, e.g. of a playlist that was just deleted.
+        """
+        with self.__changed:
+            self.__pending.pop(key, None)
+
+    def flush(self, prefix: str = ""):
+        """
+        Runs the pending saves whose key starts with prefix (all by default)
+        in the calling thread, e.g. before re-reading a file that has a save
+        pending.
+        """
+        with self.__lock:
+            with self.__changed:
+                keys = [key for key in self.__pending if key.startswith(prefix)]
+                saves = [(key, self.__pending.pop(key)) for key in keys]
+            for key, save in saves:
+                try:
+                    save()
+                except Exception as error:
+                    # The next change marks it dirty again.
+                    print(f"Saving {key} failed: {error}", file=sys.stderr)
+
+    def run(self):
+        """
+        Background loop: waits until the pending saves have been quiet for
+        `delay` seconds, then writes them.
+        """
+        while True:
+            with self.__changed:
+                while not self.__closed:
+                    if not self.__pending:
+                        self.__changed.wait()
+                        continue
+                    remaining = self.__deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self.__changed.wait(remaining)
+                if self.__closed:
+                    return
+            # Takes the pending saves only once it holds the object lock, so a
+            # flush() on the main thread never misses a save this thread took.
+            self.flush()
+
+    def idleInput(self, prompt: str = "") -> str:
+        """
+        input() that lets pending saves run while waiting for the user.
+        """
+        self.__lock.release()
+        try:
+            return input(prompt)
+        finally:
+            self.__lock.acquire()
+
+    def close(self):
+        """
+        Stops the background thread and writes everything still pending.
+        Safe to call more than once, e.g. on exit and again from atexit.
+        """
+        with self.__changed:
+            self.__closed = True
+            self.__changed.notify()
+        # Not joined: the thread may be waiting for the lock the caller holds.
+        # Once this flush has the lock, any save it was running is finished.
+        self.flush()
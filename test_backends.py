@@ -0,0 +1,171 @@
+import os
+import random
+import tempfile
+import unittest
+
+from TrackClass import Track
+from LibraryBackends import BACKENDS, createLibrary
+from LibraryContainer import LibraryContainer
+from LibraryCache import readCache, writeCache
+from PlaylistClass import Playlist
+from PlaylistCache import PlaylistCache
+
+def makeTracks(count: int, rng: random.Random) -> list:
+    """
+    Random tracks with many shared titles and artists, so duplicates,
+    same-title runs and prefix queries are all exercised.
+    """
+    return [Track(f"Title {rng.randrange(count // 4 + 1):05}", f"Artist {rng.randrange(50):03}",
+                  f"Album {rng.randrange(30):03}", f"{rng.randrange(1, 10):02}:{rng.randrange(60):02}")
+            for _ in range(count)]
+
+class BackendMatrixTest(unittest.TestCase):
+    """
+    Runs the same randomized workload against every library backend and
+    checks that they all agree with each other after every step. This is the
+    correctness half of the matrix in Benchmark.py backends.
+    """
+
+    def setUp(self):
+        # removeTrack also updates playlists on disk; keep that out of Data/.
+        self.previous = os.getcwd()
+        self.directory = tempfile.TemporaryDirectory()
+        os.makedirs(os.path.join(self.directory.name, "Data", "Playlists"))
+        os.chdir(self.directory.name)
+
+    def tearDown(self):
+        os.chdir(self.previous)
+        self.directory.cleanup()
+
+    def snapshot(self, library, probes: list) -> tuple:
+        """
+        Everything the backends must agree on, by sort key so different
+        backends can be compared.
+        """
+        keys = lambda tracks: [track.getSortKey() for track in tracks]
+        size = library.getSize()
+        return (
+            keys(library.getSortedTracks()),
+            size,
+            library.getTotalSeconds(),
+            library.getTotalDuration(),
+            [library.select(index).getSortKey() for index in range(0, size, max(size // 20, 1))],
+            [library.rank(track) for track in probes],
+            [keys(library.lowerBound(track.getTitle())) for track in probes],
+            [keys(library.getDuplicates(track.getTitle())) for track in probes],
+            [getattr(library.searchTrack(track.getTitle(), track.getArtist()), "getSortKey", lambda: None)()
+             for track in probes],
+            [keys(library.getPage(page)) for page in range(1, library.getPageCount() + 1)],
+            [keys(library.iterPrefix(track.getTitle()[:9])) for track in probes],
+        )
+
+    def testIncompleteBackendFailsOnCreation(self):
+        class Incomplete(LibraryContainer):
+            def getSize(self) -> int:
+                return 0
+
+        with self.assertRaises(TypeError):
+            Incomplete()
+
+    def testRandomizedWorkload(self):
+        for seed in range(3):
+            with self.subTest(seed=seed):
+                rng = random.Random(seed)
+                tracks = makeTracks(600, rng)
+                libraries = {name: createLibrary(name) for name in BACKENDS}
+                initial = sorted(tracks[:300], key=Track.getSortKey)
+
+                for library in libraries.values():
+                    library.buildFromSorted(list(initial))
+
+                for step in range(6):
+                    added = rng.sample(tracks, 80)
+                    removed = rng.sample(tracks, 60)
+                    probes = rng.sample(tracks, 25)
+                    results = {}
+                    for name, library in libraries.items():
+                        outcome = [library.addTrack(track) for track in added]
+                        for track in removed:
+                            library.removeTrack(track)
+                        results[name] = (outcome, self.snapshot(library, probes))
+
+                    reference = results["avl"]
+                    for name, result in results.items():
+                        self.assertEqual(result, reference, f"{name} disagrees with avl at step {step}")
+
+                    listing = reference[1][0]
+                    self.assertEqual(listing, sorted(listing))
+
+    def testIndexesBuildSeparatelyAndStayCurrent(self):
+        rng = random.Random(11)
+        tracks = sorted({track.getSortKey(): track for track in makeTracks(400, rng)}.values(),
+                        key=Track.getSortKey)
+        probes = rng.sample(tracks, 20)
+        for name in BACKENDS:
+            with self.subTest(backend=name):
+                library = createLibrary(name)
+                library.buildFromSorted(list(tracks[:300]))
+                library.getDuplicates(probes[0].getTitle())
+                # A title lookup is a seek and leaves every index unbuilt.
+                self.assertIsNone(library._LibraryContainer__searchIndex)
+                self.assertIsNone(library._LibraryContainer__artistIndex)
+                self.assertIsNone(library._LibraryContainer__albumIndex)
+
+                library.tracksByArtist(probes[0].getArtist())
+                self.assertIsNone(library._LibraryContainer__searchIndex)
+                library.searchKeywords(probes[0].getTitle())
+                for track in tracks[300:]:
+                    library.addTrack(track)
+                for track in tracks[:50]:
+                    library.removeTrack(track)
+
+                # addTrack skips tracks whose title and artist are taken, so
+                # compare against indexes built from what the library holds.
+                fresh = createLibrary("avl")
+                fresh.buildFromSorted(library.getSortedTracks())
+                for track in probes:
+                    self.assertEqual(library.tracksByArtist(track.getArtist()), fresh.tracksByArtist(track.getArtist()))
+                    self.assertEqual(library.tracksByAlbum(track.getAlbum()), fresh.tracksByAlbum(track.getAlbum()))
+                    self.assertEqual(library.searchKeywords(track.getTitle()), fresh.searchKeywords(track.getTitle()))
+
+    def testCacheRoundTrip(self):
+        rng = random.Random(7)
+        tracks = sorted({track.getSortKey(): track for track in makeTracks(40000, rng)}.values(), key=Track.getSortKey)
+        probes = rng.sample(tracks, 25)
+        with open("tracks.json", "w") as file:
+            file.write("[]")
+        for name, backend in BACKENDS.items():
+            if not backend.CACHEABLE:
+                continue
+            with self.subTest(backend=name):
+                library = createLibrary(name)
+                library.buildFromSorted(list(tracks))
+                writeCache(library, "tracks.json")
+                cached = readCache("tracks.json", backend)
+                self.assertIsNotNone(cached, f"{name} wrote no cache")
+                self.assertEqual(self.snapshot(cached, probes), self.snapshot(library, probes))
+
+    def testRemoveTrackUpdatesPlaylists(self):
+        # The library resolves the playlist files itself; nothing calls Playlist.useLibrary here.
+        tracks = sorted({track.getSortKey(): track for track in makeTracks(200, random.Random(3))}.values(),
+                        key=Track.getSortKey)
+        for name in BACKENDS:
+            with self.subTest(backend=name):
+                library = createLibrary(name)
+                library.buildFromSorted(list(tracks))
+                playlist = Playlist(f"removal-{name}")
+                for track in tracks[:10]:
+                    playlist.addTrack(track)
+                playlist.saveToJson()
+
+                library.removeTrack(tracks[3])
+                self.assertFalse(playlist.hasTrack(tracks[3]))
+                Playlist.useCache(PlaylistCache(0))
+                try:
+                    stored = Playlist.loadFromJson(playlist.getName(), library=library)
+                finally:
+                    Playlist.useCache(PlaylistCache())
+                self.assertEqual(stored.getTracks(), tracks[:3] + tracks[4:10])
+
+if __name__ == "__main__":
+    unittest.main()
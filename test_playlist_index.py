@@ -0,0 +1,103 @@
+import json
+import os
+import tempfile
+import unittest
+
+from PlaylistIndex import INDEX_VERSION, PlaylistIndex
+from TrackClass import Track
+
+class PlaylistIndexTest(unittest.TestCase):
+    """
+    Covers the stored index, its change log and how both are checked against
+    the playlist files on load.
+    """
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.playlists = os.path.join(self.directory.name, "Playlists")
+        os.mkdir(self.playlists)
+        self.filename = os.path.join(self.directory.name, "playlist_index.json")
+        self.logFile = os.path.join(self.directory.name, "playlist_index.log")
+        self.tracks = [Track(f"Title {number}", "Artist", "Album", "03:00") for number in range(6)]
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def createIndex(self) -> PlaylistIndex:
+        return PlaylistIndex(self.playlists, self.filename)
+
+    def writePlaylist(self, name: str, tracks: list, mtime: float = 1000.0) -> float:
+        """
+        Writes a playlist file as Playlist.saveToJson would and gives it a
+        fixed modification time.
+        """
+        filename = os.path.join(self.playlists, name + ".json")
+        with open(filename, 'w') as file:
+            json.dump({"name": name, "tracks": [track.getId() for track in tracks]}, file)
+        os.utime(filename, (mtime, mtime))
+        return os.path.getmtime(filename)
+
+    def testLogIsReplayedOverStoredIndex(self):
+        mtime = self.writePlaylist("A", self.tracks[:2])
+        index = self.createIndex()
+        index.load()
+        self.assertTrue(os.path.exists(self.filename))
+
+        # A change the index only knows from its log.
+        mtime = self.writePlaylist("A", self.tracks[2:4], mtime + 1)
+        index.setPlaylist("A", [track.getId() for track in self.tracks[2:4]], mtime)
+        self.assertTrue(os.path.exists(self.logFile))
+
+        reloaded = self.createIndex()
+        self.assertEqual(reloaded.getPlaylistsContaining(self.tracks[0]), [])
+        self.assertEqual(reloaded.getPlaylistsContaining(self.tracks[2]), ["A"])
+        # The replayed log was current, so no playlist file was re-read and
+        # the index was not rewritten.
+        self.assertTrue(os.path.exists(self.logFile))
+
+    def testTornLogRecordIsSkipped(self):
+        mtime = self.writePlaylist("A", self.tracks[:2])
+        index = self.createIndex()
+        index.load()
+        mtime = self.writePlaylist("B", self.tracks[1:3], mtime)
+        index.setPlaylist("B", [track.getId() for track in self.tracks[1:3]], mtime)
+        with open(self.logFile, 'a') as file:
+            file.write('{"set":"C","mtime":')
+
+        reloaded = self.createIndex()
+        self.assertEqual(reloaded.getPlaylistsContaining(self.tracks[1]), ["A", "B"])
+        self.assertEqual(reloaded.getPlaylistsContaining(self.tracks[2]), ["B"])
+        self.assertTrue(os.path.exists(self.logFile))
+
+    def testOldVersionIsRebuilt(self):
+        self.writePlaylist("A", self.tracks[:2])
+        with open(self.filename, 'w') as file:
+            json.dump({"version": INDEX_VERSION - 1,
+                       "playlists": {"Stale": {"mtime": 1.0, "tracks": [self.tracks[5].getId()]}}}, file)
+
+        index = self.createIndex()
+        self.assertEqual(index.getPlaylistsContaining(self.tracks[5]), [])
+        self.assertEqual(index.getPlaylistsContaining(self.tracks[0]), ["A"])
+        with open(self.filename, 'r') as file:
+            self.assertEqual(json.load(file)["version"], INDEX_VERSION)
+
+    def testExternallyEditedPlaylistIsReread(self):
+        mtime = self.writePlaylist("A", self.tracks[:2])
+        self.createIndex().load()
+
+        # Edited by something other than Playlist: only the mtime tells.
+        self.writePlaylist("A", self.tracks[3:5], mtime + 60)
+        index = self.createIndex()
+        self.assertEqual(index.getPlaylistsContaining(self.tracks[0]), [])
+        self.assertEqual(index.getPlaylistsContaining(self.tracks[3]), ["A"])
+
+    def testDeletedPlaylistIsForgotten(self):
+        self.writePlaylist("A", self.tracks[:2])
+        self.writePlaylist("B", self.tracks[:1])
+        self.createIndex().load()
+
+        os.remove(os.path.join(self.playlists, "A.json"))
+        self.assertEqual(self.createIndex().getPlaylistsContaining(self.tracks[0]), ["B"])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,108 @@
+import json
+import os
+import tempfile
+import unittest
+
+from TrackClass import Track
+from LibraryBackends import createLibrary
+from PlaylistClass import Playlist
+from SQLiteStorage import SQLiteStorage
+
+class SQLiteStorageTest(unittest.TestCase):
+    """
+    Covers playlists kept in the SQLite engine and the JSON import/export.
+    """
+
+    def setUp(self):
+        self.previous = os.getcwd()
+        self.directory = tempfile.TemporaryDirectory()
+        os.chdir(self.directory.name)
+        os.makedirs(os.path.join("Data", "Playlists"))
+        self.storage = SQLiteStorage(os.path.join("Data", "music.db"))
+        self.tracks = [Track(f"Song {number}", "Artist", "Album", f"0{number % 9 + 1}:00") for number in range(8)]
+        for track in self.tracks:
+            self.storage.addTrack(track)
+        Playlist.useStorage(self.storage)
+
+    def tearDown(self):
+        Playlist.useStorage(None)
+        self.storage.close()
+        os.chdir(self.previous)
+        self.directory.cleanup()
+
+    def titles(self, tracks: list) -> list:
+        return [track.getTitle() for track in tracks]
+
+    def testSaveAfterRemovalGap(self):
+        playlist = Playlist("Mix")
+        playlist.saveToJson()
+        for track in self.tracks[:5]:
+            playlist.addTrack(track)
+        # Leaves a gap in the stored positions.
+        playlist.removeTrack("Song 1")
+        playlist.addTrack(self.tracks[5])
+        playlist.saveToJson()
+
+        expected = ["Song 0", "Song 2", "Song 3", "Song 4", "Song 5"]
+        self.assertEqual(self.titles(Playlist.loadFromJson("Mix").getTracks()), expected)
+
+        # The same through a full save: the kept rows end at a taken position.
+        self.storage.savePlaylist("Gap", self.tracks[:5])
+        self.storage.removePlaylistTrack("Gap", self.tracks[1])
+        self.storage.savePlaylist("Gap", [self.tracks[number] for number in (0, 2, 3, 4, 5)])
+        self.assertEqual(self.titles(Playlist.loadFromJson("Gap").getTracks()), expected)
+
+        # A save that keeps a prefix and rewrites the rest after the gap.
+        self.storage.savePlaylist("Mix", [self.tracks[0], self.tracks[7], self.tracks[2]])
+        self.assertEqual(self.titles(Playlist.loadFromJson("Mix").getTracks()), ["Song 0", "Song 7", "Song 2"])
+        self.assertEqual(self.storage.getPlaylistInfo("Mix")["count"], 3)
+
+    def testLibraryRemovalCascadesToPlaylists(self):
+        library = createLibrary("avl")
+        library.setStorage(self.storage)
+        library.buildFromSorted(sorted(self.tracks, key=Track.getSortKey))
+        playlist = Playlist("Mix")
+        for track in self.tracks[:4]:
+            playlist.addTrack(track)
+
+        library.removeTrack(self.tracks[1])
+
+        self.assertEqual(self.titles(self.storage.loadPlaylistTracks("Mix")), ["Song 0", "Song 2", "Song 3"])
+        self.assertEqual(self.storage.getPlaylistsContaining(self.tracks[1]), [])
+        self.assertEqual(self.titles(self.storage.loadTracks()),
+                         sorted(track.getTitle() for track in self.tracks if track is not self.tracks[1]))
+
+    def testJsonRoundTrip(self):
+        source = os.path.join(self.directory.name, "source")
+        target = os.path.join(self.directory.name, "target")
+        os.makedirs(os.path.join(source, "Playlists"))
+        with open(os.path.join(source, "tracks.json"), 'w') as file:
+            json.dump([track.toDict() for track in self.tracks], file)
+        # The current format lists track IDs...
+        with open(os.path.join(source, "Playlists", "Ids.json"), 'w') as file:
+            json.dump({"name": "Ids", "total_seconds": 0,
+                       "tracks": [track.getId() for track in self.tracks[3::-1]]}, file)
+        # ...older files embed the tracks themselves.
+        with open(os.path.join(source, "Playlists", "Embedded.json"), 'w') as file:
+            json.dump({"name": "Embedded", "total_duration": "00:00",
+                       "tracks": [track.toDict() for track in self.tracks[4:]]}, file)
+
+        database = SQLiteStorage(os.path.join(self.directory.name, "roundtrip.db"))
+        try:
+            database.importJson(source)
+            database.exportJson(target)
+        finally:
+            database.close()
+
+        for name, tracks in (("Ids", self.tracks[3::-1]), ("Embedded", self.tracks[4:])):
+            with open(os.path.join(target, "Playlists", name + ".json"), 'r') as file:
+                data = json.load(file)
+            self.assertEqual(data["tracks"], [track.getId() for track in tracks])
+            self.assertEqual(data["total_seconds"], sum(track.getDurationInSeconds() for track in tracks))
+        with open(os.path.join(target, "tracks.json"), 'r') as file:
+            self.assertEqual(sorted(Track.makeId(data["title"], data["artist"], data["album"], data["duration"])
+                                    for data in json.load(file)),
+                             sorted(track.getId() for track in self.tracks))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,115 @@
+import json
+import os
+import tempfile
+import unittest
+
+from TrackClass import Track
+from TrackJournal import TrackJournal
+from LibraryBackends import createLibrary
+from PlaylistClass import Playlist
+
+class TrackJournalTest(unittest.TestCase):
+    """
+    Covers replaying the journal over the tracks.json snapshot, torn lines,
+    compaction and library removals in journal mode.
+    """
+
+    def setUp(self):
+        self.previous = os.getcwd()
+        self.directory = tempfile.TemporaryDirectory()
+        os.chdir(self.directory.name)
+        os.makedirs(os.path.join("Data", "Playlists"))
+        self.snapshot = os.path.join("Data", "tracks.json")
+        self.filename = os.path.join("Data", "tracks.journal")
+        self.tracks = [Track(f"Tune {number}", "Artist", "Album", f"0{number + 1}:30") for number in range(6)]
+        self.writeSnapshot(self.tracks[:4])
+
+    def tearDown(self):
+        os.chdir(self.previous)
+        self.directory.cleanup()
+
+    def writeSnapshot(self, tracks: list):
+        with open(self.snapshot, 'w') as file:
+            json.dump([track.toDict() for track in tracks], file)
+
+    def writeRecords(self, filename: str, records: list):
+        with open(filename, 'a') as file:
+            for record in records:
+                file.write(json.dumps(record) + "\n")
+
+    def titles(self, tracks: list) -> list:
+        return [track.getTitle() for track in tracks]
+
+    def testReplayOverSnapshot(self):
+        journal = TrackJournal(self.snapshot, self.filename)
+        journal.addTrack(self.tracks[4])
+        journal.removeTrack(self.tracks[1])
+        journal.close()
+
+        self.assertEqual(self.titles(TrackJournal(self.snapshot, self.filename).loadTracks()),
+                         ["Tune 0", "Tune 2", "Tune 3", "Tune 4"])
+
+    def testTornLastLineIsSkipped(self):
+        self.writeRecords(self.filename, [{"remove": list(self.tracks[0].getSortKey())}])
+        with open(self.filename, 'a') as file:
+            file.write('{"add": {"title": "Tu')
+
+        journal = TrackJournal(self.snapshot, self.filename)
+        self.assertEqual(self.titles(journal.loadTracks()), ["Tune 1", "Tune 2", "Tune 3"])
+
+        # The next record starts on a line of its own.
+        journal.addTrack(self.tracks[5])
+        journal.close()
+        self.assertEqual(self.titles(TrackJournal(self.snapshot, self.filename).loadTracks()),
+                         ["Tune 1", "Tune 2", "Tune 3", "Tune 5"])
+
+    def testInterruptedCompaction(self):
+        # A compaction set these records aside and stopped before writing the snapshot...
+        self.writeRecords(self.filename + ".compacting", [{"add": self.tracks[4].toDict()}])
+        # ...and later edits went to a fresh journal.
+        self.writeRecords(self.filename, [{"remove": list(self.tracks[0].getSortKey())}])
+
+        journal = TrackJournal(self.snapshot, self.filename)
+        tracks = journal.loadTracks()
+        expected = ["Tune 1", "Tune 2", "Tune 3", "Tune 4"]
+        self.assertEqual(self.titles(tracks), expected)
+
+        journal.compact(tracks, background=False)
+        self.assertFalse(os.path.exists(self.filename + ".compacting"))
+        self.assertFalse(os.path.exists(self.filename))
+        with open(self.snapshot, 'r') as file:
+            self.assertEqual([data["title"] for data in json.load(file)], expected)
+        self.assertEqual(self.titles(TrackJournal(self.snapshot, self.filename).loadTracks()), expected)
+
+    def testCompactionKeepsLeftoverRecords(self):
+        self.writeRecords(self.filename + ".compacting", [{"add": self.tracks[4].toDict()}])
+        self.writeRecords(self.filename, [{"add": self.tracks[5].toDict()}])
+
+        journal = TrackJournal(self.snapshot, self.filename)
+        # Set aside again without finishing: both files' records must survive.
+        journal.writeSnapshot = lambda tracks: None
+        journal.compact(self.tracks[:4], background=False)
+        self.assertFalse(os.path.exists(self.filename))
+        self.assertEqual(self.titles(TrackJournal(self.snapshot, self.filename).loadTracks()),
+                         ["Tune 0", "Tune 1", "Tune 2", "Tune 3", "Tune 4", "Tune 5"])
+
+    def testRemovalUpdatesPlaylistFiles(self):
+        library = createLibrary("avl")
+        library.setStorage(TrackJournal(self.snapshot, self.filename))
+        library.loadFromJson(self.snapshot)
+        playlist = Playlist("journal-removal")
+        for track in library.getSortedTracks():
+            playlist.addTrack(track)
+        playlist.saveToJson()
+
+        removed = library.searchTrack("Tune 2")
+        library.removeTrack(removed)
+        library.getStorage().close()
+
+        self.assertFalse(playlist.hasTrack(removed))
+        with open(os.path.join("Data", "Playlists", "journal-removal.json"), 'r') as file:
+            self.assertEqual(json.load(file)["tracks"],
+                             [track.getId() for track in library.getSortedTracks()])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+import io
+import os
+import tempfile
+import time
+import unittest
+from contextlib import redirect_stderr
+
+from TrackClass import Track
+from QueueClass import MusicQueue
+from SQLiteStorage import SQLiteStorage
+from WriteBehind import WriteBehind
+
+DELAY = 0.05
+
+def waitFor(condition, timeout: float = 5.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(DELAY)
+    return condition()
+
+class WriteBehindTest(unittest.TestCase):
+    """
+    Covers saves run by the background thread of the write-behind writer.
+    """
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.writer = WriteBehind(DELAY)
+
+    def tearDown(self):
+        self.writer.close()
+        MusicQueue.useWriteBehind(None)
+        MusicQueue.useStorage(None)
+        self.directory.cleanup()
+
+    def testDeferredQueueSaveWithSQLite(self):
+        # Opened on this thread, saved to from the writer's thread.
+        storage = SQLiteStorage(os.path.join(self.directory.name, "music.db"))
+        self.addCleanup(storage.close)
+        MusicQueue.useStorage(storage)
+        MusicQueue.useWriteBehind(self.writer)
+
+        queue = MusicQueue()
+        queue.addTrack(Track("Deferred", "Artist", "Album", "03:00"))
+        queue.markDirty()
+
+        errors = io.StringIO()
+        with redirect_stderr(errors):
+            saved = waitFor(lambda: not self.writer.isDirty("queue") and storage.loadQueueState() is not None)
+        self.assertTrue(saved)
+        self.assertEqual(errors.getvalue(), "")
+        self.assertEqual([data["title"] for data in storage.loadQueueState()["queue"]], ["Deferred"])
+
+    def testFailedSaveDoesNotStopOthers(self):
+        saved = []
+
+        def failing():
+            raise OSError("disk full")
+
+        errors = io.StringIO()
+        with redirect_stderr(errors):
+            self.writer.markDirty("broken", failing)
+            self.writer.markDirty("first", lambda: saved.append("first"))
+            self.assertTrue(waitFor(lambda: saved == ["first"]))
+
+            # The background thread is still running after the failure.
+            self.writer.markDirty("second", lambda: saved.append("second"))
+            self.assertTrue(waitFor(lambda: saved == ["first", "second"]))
+        self.assertIn("broken", errors.getvalue())
+        self.assertIn("disk full", errors.getvalue())
+
+if __name__ == "__main__":
+    unittest.main()